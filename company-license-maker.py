@@ -1,8 +1,14 @@
+import sys
+
+# Any argument means headless use: hand off before Tk is imported
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from company_license import main
+    sys.exit(main())
+
 import customtkinter as ctk
-import json
-from datetime import datetime
 from tkinter import filedialog, messagebox, font as tkFont
-import base64
+from company_license import generate_company_license
+from license_core import LicenseError
 
 # ---------- CONFIG ----------
 ctk.set_appearance_mode("dark")
@@ -30,7 +36,8 @@ texts = {
         "error_format": "Dates must be in YYYY-MM-DD format",
         "error_order": "Start date must be before end date",
         "warning_empty": "No license data to save",
-        "saved": "License saved to {}"
+        "saved": "License saved to {}",
+        "ledger_failed": "License saved, but it could not be recorded in the ledger: {}"
     },
     "fa": {
         "title": "ساخت لایسنس",
@@ -51,7 +58,8 @@ texts = {
         "error_format": "تاریخ‌ها باید به فرمت YYYY-MM-DD باشند",
         "error_order": "تاریخ شروع باید قبل از تاریخ پایان باشد",
         "warning_empty": "هیچ لایسنس برای ذخیره وجود ندارد",
-        "saved": "لایسنس ذخیره شد در {}"
+        "saved": "لایسنس ذخیره شد در {}",
+        "ledger_failed": "لایسنس ذخیره شد، اما ثبت آن در دفتر صدور ممکن نشد: {}"
     }
 }
 
@@ -64,24 +72,11 @@ def generate_license():
     start_date = start_date_entry.get()
     end_date = end_date_entry.get()
     try:
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-        if end <= start:
-            messagebox.showerror("Error", texts[lang]["error_order"])
-            return
-    except ValueError:
-        messagebox.showerror("Error", texts[lang]["error_format"])
+        encoded = generate_company_license(start_date, end_date)
+    except LicenseError as e:
+        messagebox.showerror("Error", texts[lang][e.code])
         return
 
-    license_data = {
-        "startDate": start_date,
-        "endDate": end_date,
-        "issuedAt": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
-        "signature": __import__("hashlib").sha256(f"{start_date}{end_date}".encode()).hexdigest()
-    }
-    json_str = json.dumps(license_data, indent=4, ensure_ascii=False)
-    encoded = base64.b64encode(json_str.encode("utf-8")).decode("utf-8")
-
     license_text.delete("1.0", "end")
     license_text.insert("1.0", encoded)
     messagebox.showinfo("Success", texts[lang]["success"])
@@ -96,6 +91,11 @@ def save_license():
     if file_path:
         with open(file_path, "w", encoding="utf-8") as f:
             f.write(content)
+        try:
+            from license_ledger import Ledger
+            Ledger().record_license(content, file_path)
+        except Exception as e:
+            messagebox.showwarning("Warning", texts[lang]["ledger_failed"].format(e))
         messagebox.showinfo("Saved", texts[lang]["saved"].format(file_path))
 
 def show_help():
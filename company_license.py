@@ -0,0 +1,210 @@
+"""Company license logic shared by ``company-license-maker.py`` and the CLI.
+
+A company license is the base64 of ``json.dumps(indent=4)`` of
+``{startDate, endDate, issuedAt, signature}``. The signature is the sha256 hex
+of ``startDate + endDate``. Only the standard library is needed, so the
+headless CLI starts in a few milliseconds.
+
+``--stream`` reads JSONL date ranges (``{"startDate": ..., "endDate": ...}``)
+and writes one license per line to stdout, or one file per record with
+``--out-dir``. It replaces a ``company-license-maker.sh`` call per license,
+which forks ``date``, ``openssl`` and ``base64`` every time.
+
+Usage:
+    python company_license.py --start-date 2025-01-01 --end-date 2025-12-31 --output company-license.lic
+    python company-license-maker.py --start-date 2025-01-01 --end-date 2025-12-31
+    python company_license.py --stream < ranges.jsonl > licenses.txt
+    python company_license.py --stream --input ranges.jsonl --out-dir licenses/
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from json.encoder import encode_basestring
+
+from license_core import DATE_FORMAT, LicenseError, save_license_file
+
+DEFAULT_OUTPUT = "company-license.lic"
+DEFAULT_NAME = "company-{line}.lic"
+ISSUED_AT_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+@lru_cache(maxsize=4096)
+def validate_dates(start_date, end_date):
+    """Same checks, and error codes, as the GUI form. Valid ranges are cached."""
+    try:
+        start = datetime.strptime(start_date, DATE_FORMAT)
+        end = datetime.strptime(end_date, DATE_FORMAT)
+    except ValueError:
+        raise LicenseError("error_format", "Dates must be in YYYY-MM-DD format")
+    if end <= start:
+        raise LicenseError("error_order", "Start date must be before end date")
+
+
+def build_company_license_data(start_date, end_date, issued_at=None):
+    issued_at = issued_at or datetime.now(timezone.utc)
+    return {
+        "startDate": start_date,
+        "endDate": end_date,
+        "issuedAt": issued_at.strftime(ISSUED_AT_FORMAT),
+        "signature": hashlib.sha256(f"{start_date}{end_date}".encode()).hexdigest()
+    }
+
+
+def encode_company_license(license_data):
+    """base64 of ``json.dumps(license_data, indent=4, ensure_ascii=False)``.
+
+    The four string fields are rendered straight into that layout: ``indent``
+    forces json onto its pure Python encoder, which is most of the cost.
+    """
+    json_str = "{\n" + ",\n".join(
+        f"    {encode_basestring(key)}: {encode_basestring(value)}"
+        for key, value in license_data.items()
+    ) + "\n}"
+    return base64.b64encode(json_str.encode("utf-8")).decode("utf-8")
+
+
+def generate_company_license(start_date, end_date, issued_at=None):
+    """Validate the dates and return the base64 company license string."""
+    validate_dates(start_date, end_date)
+    return encode_company_license(build_company_license_data(start_date, end_date, issued_at))
+
+
+def stream_company_licenses(lines):
+    """Yield ``(line, record, encoded, error)`` for each JSONL date range.
+
+    ``issuedAt`` is formatted once per second rather than once per record.
+    """
+    stamp = None
+    issued_at = None
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        record = None
+        try:
+            record = json.loads(line)
+            start_date, end_date = str(record["startDate"]), str(record["endDate"])
+            validate_dates(start_date, end_date)
+        except LicenseError as e:
+            yield line_no, record, None, str(e)
+            continue
+        except (ValueError, KeyError, TypeError) as e:
+            yield line_no, record, None, f"Bad record: {e}"
+            continue
+        now = int(time.time())
+        if now != stamp:
+            stamp = now
+            issued_at = datetime.fromtimestamp(now, timezone.utc).strftime(ISSUED_AT_FORMAT)
+        yield line_no, record, encode_company_license({
+            "startDate": start_date,
+            "endDate": end_date,
+            "issuedAt": issued_at,
+            "signature": hashlib.sha256(f"{start_date}{end_date}".encode()).hexdigest()
+        }), None
+
+
+def _output_path(record, line_no, out_dir, name_template):
+    file_name = record.get("output")
+    if not file_name:
+        # The line number wins over a record field of the same name
+        fields = dict(record, line=line_no)
+        try:
+            file_name = name_template.format_map(fields)
+        except (KeyError, IndexError, AttributeError, ValueError) as e:
+            raise ValueError(f"Cannot fill name template {name_template!r}: {e!r}")
+    if not isinstance(file_name, str):
+        raise ValueError(f"Invalid output name: {file_name!r}")
+    if os.path.basename(file_name) != file_name or file_name in ("", ".", ".."):
+        raise ValueError(f"Invalid output name: {file_name!r}")
+    return os.path.join(out_dir, file_name)
+
+
+def run_stream(lines, out, out_dir=None, name_template=DEFAULT_NAME):
+    """Write streamed licenses to ``out`` (one per line) or to files in ``out_dir``.
+
+    On stdout a record that fails, and a blank input line, get an empty line,
+    so output line N always belongs to input line N. Returns ``(issued, failed)``.
+    """
+    issued = failed = 0
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    written = 0
+    for line_no, record, encoded, error in stream_company_licenses(lines):
+        if not out_dir:
+            # stream_company_licenses skips blank lines; keep their places
+            out.write("\n" * (line_no - 1 - written))
+            written = line_no
+        if error is None and out_dir:
+            try:
+                path = _output_path(record, line_no, out_dir, name_template)
+                save_license_file(path, encoded)
+            except (OSError, ValueError) as e:
+                error = str(e)
+        if error is not None:
+            failed += 1
+            print(f"[ERROR] line {line_no}: {error}", file=sys.stderr)
+            if not out_dir:
+                out.write("\n")
+            continue
+        issued += 1
+        if not out_dir:
+            out.write(encoded + "\n")
+    return issued, failed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate a company license without the GUI.")
+    parser.add_argument("--start-date", help="YYYY-MM-DD")
+    parser.add_argument("--end-date", help="YYYY-MM-DD")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help="Output file, '-' for stdout (default: %(default)s)")
+    parser.add_argument("--ledger", help="Record the issued license in this ledger")
+    stream = parser.add_argument_group("streaming")
+    stream.add_argument("--stream", action="store_true",
+                        help="Read JSONL date ranges and write one license per record")
+    stream.add_argument("--input", help="JSONL file to read instead of stdin")
+    stream.add_argument("--out-dir", help="Write one file per record here instead of to stdout")
+    stream.add_argument("--name", default=DEFAULT_NAME,
+                        help="File name template for --out-dir, unless a record has "
+                             "an 'output' field (default: %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.stream:
+        if args.input:
+            with open(args.input, "r", encoding="utf-8") as f:
+                issued, failed = run_stream(f, sys.stdout, args.out_dir, args.name)
+        else:
+            issued, failed = run_stream(sys.stdin, sys.stdout, args.out_dir, args.name)
+        print(f"[INFO] Issued {issued} company license(s), {failed} failed", file=sys.stderr)
+        return 1 if failed else 0
+    if not args.start_date or not args.end_date:
+        parser.error("--start-date and --end-date are required (or use --stream)")
+    try:
+        content = generate_company_license(args.start_date, args.end_date)
+    except LicenseError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    if args.output == "-":
+        print(content)
+        return 0
+    save_license_file(args.output, content)
+    if args.ledger:
+        # The ledger pulls in the verifier (and cryptography); only pay for it when asked
+        from license_ledger import Ledger
+        Ledger(args.ledger).record_license(content, args.output)
+    print(f"[INFO] Company license saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
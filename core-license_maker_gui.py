@@ -1,13 +1,23 @@
+import sys
+
+# Any argument means headless use: hand off before Tk is imported
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from license_cli import main
+    sys.exit(main())
+
 import customtkinter as ctk
-import json
-import base64
-import hashlib
 import os
-from datetime import datetime
+import queue
+import threading
 from tkinter import filedialog, messagebox, font as tkFont
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.backends import default_backend
+from license_core import (
+    AVAILABLE_MODULES,
+    LicenseError,
+    generate_license as build_signed_license,
+    save_license_file,
+    validate_license_input,
+)
+from license_presets import ALL_PRESET, load_presets, save_preset
 
 # ---------- CONFIG ----------
 ctk.set_appearance_mode("dark")
@@ -15,29 +25,12 @@ ctk.set_default_color_theme("blue")
 
 lang = "en"
 
-# Available modules
-AVAILABLE_MODULES = [
-    "auth",
-    "admin",
-    "personal-space",
-    "gps",
-    "stations",
-    "subscription",
-    "ticket",
-    "user",
-    "ppk",
-    "spp",
-    "static",
-    "calendar",
-    "ion",
-    "ppp"
-]
-
 texts = {
     "en": {
         "title": "License Maker",
         "customer_id": "Customer ID",
         "private_key": "Private Key (PEM)",
+        "key_password": "Key Password (optional)",
         "browse": "Browse...",
         "start_date": "Start Date (YYYY-MM-DD)",
         "end_date": "End Date (YYYY-MM-DD)",
@@ -54,25 +47,42 @@ texts = {
             "2. Choose Private Key (PEM)\n"
             "3. Enter Start Date (YYYY-MM-DD)\n"
             "4. Enter End Date (YYYY-MM-DD)\n"
-            "5. Select modules using checkboxes\n"
+            "5. Select modules using checkboxes (type to search, or pick a preset)\n"
             "6. Click 'Generate License' to create the license\n"
             "7. Click 'Save License' to save it as a .lic file\n\n"
-            "Note: The private key is used to sign the license (RSA-SHA256)."
+            "For many customers, fill the form and click 'Add to Queue' for each one, then click\n"
+            "'Generate License' and choose a folder: one {customerId}.lic is written per customer.\n\n"
+            "Note: The private key is used to sign the license (RSA-SHA256, ECDSA P-256 or Ed25519)."
         ),
         "success": "License generated successfully!",
         "error_format": "Dates must be in YYYY-MM-DD format",
         "error_order": "Start date must be before end date",
         "warning_empty": "No license data to save",
         "saved": "License saved to {}",
+        "ledger_failed": "License saved, but it could not be recorded in the ledger: {}",
         "error_customer": "Customer ID is required",
         "error_modules": "Please select at least one module",
         "error_private_key": "Private key file not found or invalid!",
-        "error_private_key_missing": "Please choose a private key file (.pem)"
+        "error_private_key_missing": "Please choose a private key file (.pem)",
+        "add_to_queue": "Add to Queue",
+        "clear_queue": "Clear Queue",
+        "cancel": "Cancel",
+        "queue": "Queue: {} customer(s). Generate writes one .lic per customer.",
+        "choose_out_dir": "Choose a folder for the licenses",
+        "working": "Working... {}/{}",
+        "queue_done": "Issued {} license(s) to {}",
+        "queue_failed": "{} customer(s) failed:\n{}",
+        "queue_cancelled": "Cancelled after {} of {} customer(s)",
+        "search_modules": "Search modules...",
+        "save_preset": "Save Preset",
+        "preset_name": "Preset name for the selected modules:",
+        "selected_count": "{} of {} modules selected"
     },
     "fa": {
         "title": "ساخت لایسنس",
         "customer_id": "شناسه مشتری",
         "private_key": "کلید خصوصی (PEM)",
+        "key_password": "رمز کلید (اختیاری)",
         "browse": "انتخاب فایل...",
         "start_date": "تاریخ شروع (YYYY-MM-DD)",
         "end_date": "تاریخ پایان (YYYY-MM-DD)",
@@ -89,20 +99,36 @@ texts = {
             "۲. کلید خصوصی (PEM) را انتخاب کنید\n"
             "۳. تاریخ شروع را وارد کنید (YYYY-MM-DD)\n"
             "۴. تاریخ پایان را وارد کنید (YYYY-MM-DD)\n"
-            "۵. ماژول‌ها را با استفاده از چک‌باکس انتخاب کنید\n"
+            "۵. ماژول‌ها را با استفاده از چک‌باکس انتخاب کنید (برای جستجو تایپ کنید یا یک پیش‌تنظیم انتخاب کنید)\n"
             "۶. روی «ساخت لایسنس» کلیک کنید\n"
             "۷. برای ذخیره روی «ذخیره لایسنس» کلیک کنید (فایل با پسوند .lic ذخیره می‌شود)\n\n"
-            "توجه: از این کلید برای امضای لایسنس (RSA-SHA256) استفاده می‌شود."
+            "برای چند مشتری، فرم هر مشتری را پر کرده و «افزودن به صف» را بزنید، سپس «ساخت لایسنس» را\n"
+            "بزنید و یک پوشه انتخاب کنید: برای هر مشتری یک فایل {customerId}.lic ساخته می‌شود.\n\n"
+            "توجه: از این کلید برای امضای لایسنس (RSA-SHA256، ECDSA P-256 یا Ed25519) استفاده می‌شود."
         ),
         "success": "لایسنس با موفقیت ایجاد شد!",
         "error_format": "تاریخ‌ها باید به فرمت YYYY-MM-DD باشند",
         "error_order": "تاریخ شروع باید قبل از تاریخ پایان باشد",
         "warning_empty": "هیچ لایسنس برای ذخیره وجود ندارد",
         "saved": "لایسنس ذخیره شد در {}",
+        "ledger_failed": "لایسنس ذخیره شد، اما ثبت آن در دفتر صدور ممکن نشد: {}",
         "error_customer": "شناسه مشتری الزامی است",
         "error_modules": "لطفاً حداقل یک ماژول انتخاب کنید",
         "error_private_key": "فایل کلید خصوصی نامعتبر یا یافت نشد!",
-        "error_private_key_missing": "لطفاً فایل کلید خصوصی (.pem) را انتخاب کنید"
+        "error_private_key_missing": "لطفاً فایل کلید خصوصی (.pem) را انتخاب کنید",
+        "add_to_queue": "افزودن به صف",
+        "clear_queue": "پاک کردن صف",
+        "cancel": "لغو",
+        "queue": "صف: {} مشتری. با ساخت لایسنس برای هر مشتری یک فایل .lic ساخته می‌شود.",
+        "choose_out_dir": "پوشه‌ای برای لایسنس‌ها انتخاب کنید",
+        "working": "در حال انجام... {}/{}",
+        "queue_done": "{} لایسنس در {} ساخته شد",
+        "queue_failed": "ساخت لایسنس برای {} مشتری ناموفق بود:\n{}",
+        "queue_cancelled": "پس از {} از {} مشتری لغو شد",
+        "search_modules": "جستجوی ماژول‌ها...",
+        "save_preset": "ذخیره پیش‌تنظیم",
+        "preset_name": "نام پیش‌تنظیم برای ماژول‌های انتخاب‌شده:",
+        "selected_count": "{} از {} ماژول انتخاب شده"
     }
 }
 
@@ -111,57 +137,106 @@ def font_exists(font_name):
     return font_name in tkFont.families()
 
 # ---------- LOGIC ----------
-def generate_random_hex_prefix(length=129):
-    """Generate a hex-only random string with the exact requested length (matches TS behavior)."""
-    import secrets
-    # secrets.token_hex(n) returns 2n hex chars; make slightly longer then trim to exact length
-    hex_str = secrets.token_hex((length // 2) + 1)
-    return hex_str[:length]
-
-def generate_signature_with_private_key(license_data, key_path: str):
-    """Generate a signature using the provided private key (PEM)."""
-    try:
-        if not os.path.exists(key_path):
-            raise FileNotFoundError("Key not found")
-        # Read private key file
-        with open(key_path, "rb") as key_file:
-            private_key = serialization.load_pem_private_key(
-                key_file.read(),
-                password=None,
-                backend=default_backend()
-            )
-        
-        # Create license data string (exactly like TypeScript JSON.stringify: no spaces, same key order)
-        license_str = json.dumps(license_data, separators=(",", ":"), ensure_ascii=False)
-        
-        # Sign the data
-        signature = private_key.sign(
-            license_str.encode('utf-8'),
-            padding.PKCS1v15(),
-            hashes.SHA256()
-        )
-        
-        return signature.hex()
-    except Exception as e:
-        raise Exception(f"SIGN_ERROR: {str(e)}")
-
 def get_selected_modules():
-    """Get list of selected modules from checkboxes"""
-    selected = []
-    for module, var in module_vars.items():
-        if var.get():
-            selected.append(module)
-    return selected
+    """Selected modules, in catalogue order"""
+    return [module for module in AVAILABLE_MODULES if module in selected_modules]
 
 def select_all_modules():
-    """Select all modules"""
-    for var in module_vars.values():
-        var.set(True)
+    """Select every module that matches the search"""
+    selected_modules.update(filtered_modules)
+    render_modules()
 
 def deselect_all_modules():
-    """Deselect all modules"""
-    for var in module_vars.values():
-        var.set(False)
+    """Deselect every module that matches the search"""
+    selected_modules.difference_update(filtered_modules)
+    render_modules()
+
+# ---------- MODULE PICKER ----------
+# Only PICKER_ROWS x PICKER_COLUMNS checkboxes exist. Scrolling and searching
+# relabel them, so the widget count stays fixed however big the catalogue gets.
+# Selection lives in selected_modules, not in the widgets.
+PICKER_ROWS = 6
+PICKER_COLUMNS = 3
+selected_modules = set()
+filtered_modules = list(AVAILABLE_MODULES)
+picker_top = 0  # first visible row of filtered_modules
+module_presets = load_presets()
+
+def picker_row_count():
+    return -(-len(filtered_modules) // PICKER_COLUMNS)
+
+def render_modules():
+    for slot, checkbox in enumerate(module_checkboxes):
+        index = picker_top * PICKER_COLUMNS + slot
+        if index < len(filtered_modules):
+            module = filtered_modules[index]
+            checkbox.configure(text=module)
+            if module in selected_modules:
+                checkbox.select()
+            else:
+                checkbox.deselect()
+            checkbox.grid()
+        else:
+            checkbox.grid_remove()
+    rows = picker_row_count()
+    if rows <= PICKER_ROWS:
+        module_scrollbar.set(0, 1)
+    else:
+        module_scrollbar.set(picker_top / rows, (picker_top + PICKER_ROWS) / rows)
+    update_module_count()
+
+def update_module_count():
+    module_count_label.configure(
+        text=texts[lang]["selected_count"].format(len(selected_modules), len(AVAILABLE_MODULES)))
+
+def toggle_module(slot):
+    module = filtered_modules[picker_top * PICKER_COLUMNS + slot]
+    if module_checkboxes[slot].get():
+        selected_modules.add(module)
+    else:
+        selected_modules.discard(module)
+    update_module_count()
+
+def scroll_modules_to(top):
+    global picker_top
+    picker_top = max(0, min(top, picker_row_count() - PICKER_ROWS))
+    render_modules()
+
+def on_module_scrollbar(action, amount, unit=None):
+    if action == "moveto":
+        scroll_modules_to(round(float(amount) * picker_row_count()))
+    else:
+        step = PICKER_ROWS if unit == "pages" else 1
+        scroll_modules_to(picker_top + int(amount) * step)
+
+def on_module_wheel(event):
+    # Windows/macOS report a delta; X11 sends buttons 4 (up) and 5 (down)
+    up = event.num == 4 or event.delta > 0
+    scroll_modules_to(picker_top + (-1 if up else 1))
+
+def filter_modules(event=None):
+    global filtered_modules
+    needle = module_search_entry.get().strip().lower()
+    filtered_modules = [m for m in AVAILABLE_MODULES if needle in m.lower()]
+    scroll_modules_to(0)
+
+def apply_preset(name):
+    selected_modules.clear()
+    selected_modules.update(module_presets.get(name, ()))
+    render_modules()
+
+def save_current_preset():
+    global module_presets
+    name = ctk.CTkInputDialog(text=texts[lang]["preset_name"], title=texts[lang]["save_preset"]).get_input()
+    if not name or not name.strip():
+        return
+    try:
+        module_presets = save_preset(name.strip(), get_selected_modules())
+    except (OSError, ValueError) as e:
+        messagebox.showerror("Error", str(e))
+        return
+    preset_menu.configure(values=list(module_presets))
+    preset_menu.set(name.strip())
 
 def browse_private_key():
     file_path = filedialog.askopenfilename(
@@ -172,70 +247,166 @@ def browse_private_key():
         private_key_entry.delete(0, "end")
         private_key_entry.insert(0, file_path)
 
+def read_form():
+    """Current form values as a manifest-style row (see ``license_batch``)."""
+    return {
+        "customerId": customer_id_entry.get().strip(),
+        "startDate": start_date_entry.get().strip(),
+        "endDate": end_date_entry.get().strip(),
+        "modules": get_selected_modules(),
+        "key": "",
+    }
+
 def generate_license():
-    customer_id = customer_id_entry.get().strip()
     key_path = private_key_entry.get().strip()
-    start_date = start_date_entry.get().strip()
-    end_date = end_date_entry.get().strip()
-    modules = get_selected_modules()
-    
-    # Validate customer ID
-    if not customer_id:
-        messagebox.showerror("Error", texts[lang]["error_customer"])
+    key_password = key_password_entry.get()
+    if job_queue:
+        out_dir = filedialog.askdirectory(title=texts[lang]["choose_out_dir"])
+        if out_dir:
+            start_worker(queue_worker, list(job_queue), key_path, key_password, out_dir)
         return
-    
-    # Validate private key path
-    if not key_path:
-        messagebox.showerror("Error", texts[lang]["error_private_key_missing"])
-        return
-    
-    # Validate modules
-    if not modules:
-        messagebox.showerror("Error", texts[lang]["error_modules"])
-        return
-    
-    # Validate dates
+    row = read_form()
+    start_worker(single_worker, row["customerId"], key_path, row["startDate"], row["endDate"],
+                 row["modules"], key_password)
+
+def add_to_queue():
+    row = read_form()
     try:
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-        if end <= start:
-            messagebox.showerror("Error", texts[lang]["error_order"])
-            return
-    except ValueError:
-        messagebox.showerror("Error", texts[lang]["error_format"])
+        validate_license_input(row["customerId"], private_key_entry.get().strip(),
+                               row["startDate"], row["endDate"], row["modules"])
+    except LicenseError as e:
+        messagebox.showerror("Error", texts[lang][e.code])
         return
-    
-    # Create license data structure similar to TypeScript version
-    license_data = {
-        "customerId": customer_id,
-        "startDate": start_date,
-        "endDate": end_date,
-        "modules": modules
-    }
-    
+    job_queue.append(row)
+    refresh_queue_view()
+
+def clear_queue():
+    job_queue.clear()
+    refresh_queue_view()
+
+def refresh_queue_view():
+    queue_label.configure(text=texts[lang]["queue"].format(len(job_queue)))
+    queue_text.configure(state="normal")
+    queue_text.delete("1.0", "end")
+    queue_text.insert("1.0", "\n".join(
+        f"{row['customerId']}  {row['startDate']} - {row['endDate']}  ({len(row['modules'])} modules)"
+        for row in job_queue))
+    queue_text.configure(state="disabled")
+
+# ---------- WORKER ----------
+# Signing runs on a worker thread; it only talks to Tk through worker_events,
+# which the main thread drains every POLL_MS via app.after.
+POLL_MS = 50
+job_queue = []
+worker_events = queue.Queue()
+cancel_event = threading.Event()
+
+def start_worker(target, *args):
+    cancel_event.clear()
+    generate_btn.configure(state="disabled")
+    add_queue_btn.configure(state="disabled")
+    clear_queue_btn.configure(state="disabled")
+    progress_bar.set(0)
+    if target is queue_worker:
+        cancel_btn.configure(state="normal")
+    else:
+        # A single signature has no steps to report; just show that work is going on
+        progress_bar.configure(mode="indeterminate")
+        progress_bar.start()
+    threading.Thread(target=target, args=args, daemon=True).start()
+    app.after(POLL_MS, poll_worker)
+
+def finish_worker():
+    generate_btn.configure(state="normal")
+    add_queue_btn.configure(state="normal")
+    clear_queue_btn.configure(state="normal")
+    cancel_btn.configure(state="disabled")
+    progress_label.configure(text="")
+    progress_bar.stop()
+    progress_bar.configure(mode="determinate")
+
+def cancel_worker():
+    cancel_event.set()
+    cancel_btn.configure(state="disabled")
+
+def single_worker(customer_id, key_path, start_date, end_date, modules, key_password):
     try:
-        # Generate signature using selected private key
-        signature = generate_signature_with_private_key(license_data, key_path)
-        random_prefix = generate_random_hex_prefix(129)
-        full_signature = random_prefix + signature
-        
-        # Add signature to license
-        license_with_signature = {
-            **license_data,
-            "signature": full_signature
-        }
-        
-        # Convert to base64
-        license_json = json.dumps(license_with_signature, separators=(",", ":"), ensure_ascii=False)
-        encoded_license = base64.b64encode(license_json.encode('utf-8')).decode('utf-8')
-        
-        # Display in text area
-        license_text.delete("1.0", "end")
-        license_text.insert("1.0", encoded_license)
-        messagebox.showinfo("Success", texts[lang]["success"])
-        
+        worker_events.put(("license", build_signed_license(customer_id, key_path, start_date,
+                                                           end_date, modules, key_password)))
+    except LicenseError as e:
+        worker_events.put(("error", e.code))
     except Exception as e:
-        messagebox.showerror("Error", texts[lang]["error_private_key"])
+        # Anything else must still reach poll_worker, or the form stays disabled
+        worker_events.put(("error", str(e)))
+
+def queue_worker(rows, key_path, key_password, out_dir):
+    # Batch helpers pull in multiprocessing and the verifier; load them on first use
+    from license_batch import issue_row
+    from license_ledger import Ledger
+    ledger = Ledger()
+    done = issued = 0
+    failed = []
+    try:
+        for row in rows:
+            if cancel_event.is_set():
+                break
+            try:
+                path = issue_row(row, key_path, out_dir, password=key_password)
+            except LicenseError as e:
+                failed.append((row["customerId"], e.code))
+            except Exception as e:
+                failed.append((row["customerId"], str(e)))
+            else:
+                issued += 1
+                try:
+                    with open(path, "rb") as f:
+                        ledger.record_license(f.read(), path)
+                except Exception as e:
+                    failed.append((row["customerId"], texts[lang]["ledger_failed"].format(e)))
+            done += 1
+            worker_events.put(("progress", done, len(rows)))
+    finally:
+        # Always report back so poll_worker re-enables the form
+        worker_events.put(("batch", done, len(rows), issued, failed, out_dir))
+
+def poll_worker():
+    while True:
+        try:
+            event, *data = worker_events.get_nowait()
+        except queue.Empty:
+            app.after(POLL_MS, poll_worker)
+            return
+        if event == "progress":
+            done, total = data
+            progress_bar.set(done / total)
+            progress_label.configure(text=texts[lang]["working"].format(done, total))
+        elif event == "license":
+            finish_worker()
+            progress_bar.set(1)
+            license_text.delete("1.0", "end")
+            license_text.insert("1.0", data[0])
+            messagebox.showinfo("Success", texts[lang]["success"])
+            return
+        elif event == "error":
+            finish_worker()
+            messagebox.showerror("Error", texts[lang].get(data[0], data[0]))
+            return
+        else:
+            done, total, issued, failed, out_dir = data
+            finish_worker()
+            # Processed rows leave the queue; anything after a cancel stays for next time
+            del job_queue[:done]
+            refresh_queue_view()
+            message = texts[lang]["queue_done"].format(issued, out_dir)
+            if done < total:
+                message += "\n" + texts[lang]["queue_cancelled"].format(done, total)
+            if failed:
+                details = "\n".join(f"{cid}: {texts[lang].get(reason, reason)}" for cid, reason in failed)
+                messagebox.showwarning("Warning", message + "\n\n" +
+                                       texts[lang]["queue_failed"].format(len(failed), details))
+            else:
+                messagebox.showinfo("Success", message)
+            return
 
 def save_license():
     content = license_text.get("1.0", "end").strip()
@@ -250,11 +421,16 @@ def save_license():
     
     if file_path:
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(content)
-            messagebox.showinfo("Saved", texts[lang]["saved"].format(file_path))
+            save_license_file(file_path, content)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save file: {str(e)}")
+            return
+        try:
+            from license_ledger import Ledger
+            Ledger().record_license(content, file_path)
+        except Exception as e:
+            messagebox.showwarning("Warning", texts[lang]["ledger_failed"].format(e))
+        messagebox.showinfo("Saved", texts[lang]["saved"].format(file_path))
 
 def show_help():
     messagebox.showinfo(texts[lang]["help"], texts[lang]["help_text"])
@@ -277,32 +453,50 @@ def update_ui_texts():
         customer_id_entry.configure(placeholder_text=texts[lang]["customer_id"], justify="right", font=persian_font)
         private_key_label.configure(text=texts[lang]["private_key"], anchor="e", font=persian_font)
         browse_btn.configure(text=texts[lang]["browse"], font=persian_font)
+        key_password_entry.configure(placeholder_text=texts[lang]["key_password"], justify="right", font=persian_font)
         start_date_entry.configure(placeholder_text=texts[lang]["start_date"], justify="right", font=persian_font)
         end_date_entry.configure(placeholder_text=texts[lang]["end_date"], justify="right", font=persian_font)
         modules_label.configure(text=texts[lang]["modules"], anchor="e", font=persian_font)
         select_all_btn.configure(text=texts[lang]["select_all"], font=persian_font)
         deselect_all_btn.configure(text=texts[lang]["deselect_all"], font=persian_font)
+        save_preset_btn.configure(text=texts[lang]["save_preset"], font=persian_font)
+        module_search_entry.configure(placeholder_text=texts[lang]["search_modules"], justify="right", font=persian_font)
+        module_count_label.configure(anchor="e", font=persian_font)
         generate_btn.configure(text=texts[lang]["generate"], font=persian_font)
         save_btn.configure(text=texts[lang]["save"], font=persian_font)
         help_btn.configure(text=texts[lang]["help"], font=persian_font)
         license_label.configure(text=texts[lang]["license_output"], anchor="e", font=persian_font)
         license_text.configure(justify="right", font=persian_font)
+        queue_label.configure(anchor="e", font=persian_font)
+        add_queue_btn.configure(text=texts[lang]["add_to_queue"], font=persian_font)
+        clear_queue_btn.configure(text=texts[lang]["clear_queue"], font=persian_font)
+        cancel_btn.configure(text=texts[lang]["cancel"], font=persian_font)
     else:
         title_label.configure(text=texts[lang]["title"], anchor="w", font=("Segoe UI", 22, "bold"))
         customer_id_label.configure(text=texts[lang]["customer_id"], anchor="w", font=english_font)
         customer_id_entry.configure(placeholder_text=texts[lang]["customer_id"], justify="left", font=english_font)
         private_key_label.configure(text=texts[lang]["private_key"], anchor="w", font=english_font)
         browse_btn.configure(text=texts[lang]["browse"], font=english_font)
+        key_password_entry.configure(placeholder_text=texts[lang]["key_password"], justify="left", font=english_font)
         start_date_entry.configure(placeholder_text=texts[lang]["start_date"], justify="left", font=english_font)
         end_date_entry.configure(placeholder_text=texts[lang]["end_date"], justify="left", font=english_font)
         modules_label.configure(text=texts[lang]["modules"], anchor="w", font=english_font)
         select_all_btn.configure(text=texts[lang]["select_all"], font=english_font)
         deselect_all_btn.configure(text=texts[lang]["deselect_all"], font=english_font)
+        save_preset_btn.configure(text=texts[lang]["save_preset"], font=english_font)
+        module_search_entry.configure(placeholder_text=texts[lang]["search_modules"], justify="left", font=english_font)
+        module_count_label.configure(anchor="w", font=english_font)
         generate_btn.configure(text=texts[lang]["generate"], font=english_font)
         save_btn.configure(text=texts[lang]["save"], font=english_font)
         help_btn.configure(text=texts[lang]["help"], font=english_font)
         license_label.configure(text=texts[lang]["license_output"], anchor="w", font=english_font)
         license_text.configure(justify="left", font=english_font)
+        queue_label.configure(anchor="w", font=english_font)
+        add_queue_btn.configure(text=texts[lang]["add_to_queue"], font=english_font)
+        clear_queue_btn.configure(text=texts[lang]["clear_queue"], font=english_font)
+        cancel_btn.configure(text=texts[lang]["cancel"], font=english_font)
+    refresh_queue_view()
+    update_module_count()
 
     # Reorder buttons for RTL/LTR
     if lang == "fa":
@@ -316,7 +510,7 @@ def update_ui_texts():
 
 # ---------- UI ----------
 app = ctk.CTk()
-app.geometry("900x750")
+app.geometry("900x900")
 app.title(texts[lang]["title"])
 
 # Title
@@ -344,6 +538,8 @@ private_key_entry = ctk.CTkEntry(private_key_frame, placeholder_text="private_ke
 private_key_entry.pack(side="left", expand=True, fill="x")
 browse_btn = ctk.CTkButton(private_key_frame, text=texts[lang]["browse"], width=110, command=browse_private_key)
 browse_btn.pack(side="left", padx=8)
+key_password_entry = ctk.CTkEntry(app, placeholder_text=texts[lang]["key_password"], show="*", width=350)
+key_password_entry.pack(pady=5)
 
 # Start Date
 start_date_entry = ctk.CTkEntry(app, placeholder_text=texts[lang]["start_date"], width=350)
@@ -362,22 +558,40 @@ select_buttons_frame = ctk.CTkFrame(app)
 select_buttons_frame.pack(pady=5)
 select_all_btn = ctk.CTkButton(select_buttons_frame, text=texts[lang]["select_all"], command=select_all_modules, width=120)
 deselect_all_btn = ctk.CTkButton(select_buttons_frame, text=texts[lang]["deselect_all"], command=deselect_all_modules, width=120)
+preset_menu = ctk.CTkOptionMenu(select_buttons_frame, values=list(module_presets), command=apply_preset, width=140)
+preset_menu.set(ALL_PRESET)
+save_preset_btn = ctk.CTkButton(select_buttons_frame, text=texts[lang]["save_preset"], command=save_current_preset, width=120)
 select_all_btn.pack(side="left", padx=5)
 deselect_all_btn.pack(side="left", padx=5)
-
-# Modules checkboxes frame
-modules_frame = ctk.CTkScrollableFrame(app, width=700, height=180)
-modules_frame.pack(pady=5, padx=20, fill="x")
-
-# Create checkboxes for modules
-module_vars = {}
-default_modules = ["auth","admin", "personal-space", "gps", "stations", "subscription", "ticket", "user", "ppk", "spp", "static","calendar","ion","ppp"]
-
-for i, module in enumerate(AVAILABLE_MODULES):
-    var = ctk.BooleanVar(value=module in default_modules)
-    module_vars[module] = var
-    checkbox = ctk.CTkCheckBox(modules_frame, text=module, variable=var)
-    checkbox.grid(row=i//3, column=i%3, sticky="w", padx=10, pady=2)
+preset_menu.pack(side="left", padx=5)
+save_preset_btn.pack(side="left", padx=5)
+
+# Module search
+module_search_entry = ctk.CTkEntry(app, placeholder_text=texts[lang]["search_modules"], width=350)
+module_search_entry.pack(pady=5)
+module_search_entry.bind("<KeyRelease>", filter_modules)
+
+# Module picker: a fixed pool of checkboxes over the filtered catalogue
+module_picker_frame = ctk.CTkFrame(app)
+module_picker_frame.pack(pady=5, padx=20, fill="x")
+module_checkboxes = []
+for slot in range(PICKER_ROWS * PICKER_COLUMNS):
+    checkbox = ctk.CTkCheckBox(module_picker_frame, text="", width=200,
+                               command=lambda slot=slot: toggle_module(slot))
+    checkbox.grid(row=slot // PICKER_COLUMNS, column=slot % PICKER_COLUMNS, sticky="w", padx=10, pady=2)
+    module_checkboxes.append(checkbox)
+module_scrollbar = ctk.CTkScrollbar(module_picker_frame, command=on_module_scrollbar)
+module_scrollbar.grid(row=0, column=PICKER_COLUMNS, rowspan=PICKER_ROWS, sticky="ns")
+for column in range(PICKER_COLUMNS):
+    module_picker_frame.grid_columnconfigure(column, weight=1)
+for widget in [module_picker_frame, *module_checkboxes]:
+    widget.bind("<MouseWheel>", on_module_wheel)
+    widget.bind("<Button-4>", on_module_wheel)
+    widget.bind("<Button-5>", on_module_wheel)
+
+module_count_label = ctk.CTkLabel(app, text="", font=("Segoe UI", 11), anchor="w")
+module_count_label.pack(fill="x", padx=20)
+apply_preset(ALL_PRESET)
 
 # Buttons
 btn_frame = ctk.CTkFrame(app)
@@ -390,6 +604,25 @@ generate_btn.grid(row=0, column=0, padx=5)
 save_btn.grid(row=0, column=1, padx=5)
 help_btn.grid(row=0, column=2, padx=5)
 
+# Batch queue
+queue_label = ctk.CTkLabel(app, text=texts[lang]["queue"].format(0), font=("Segoe UI", 12), anchor="w")
+queue_label.pack(pady=(5, 0), fill="x", padx=20)
+queue_text = ctk.CTkTextbox(app, height=70, wrap="none", state="disabled")
+queue_text.pack(pady=5, padx=20, fill="x")
+queue_btn_frame = ctk.CTkFrame(app)
+queue_btn_frame.pack(pady=5)
+add_queue_btn = ctk.CTkButton(queue_btn_frame, text=texts[lang]["add_to_queue"], command=add_to_queue, width=120)
+clear_queue_btn = ctk.CTkButton(queue_btn_frame, text=texts[lang]["clear_queue"], command=clear_queue, width=120)
+cancel_btn = ctk.CTkButton(queue_btn_frame, text=texts[lang]["cancel"], command=cancel_worker, width=120, state="disabled")
+add_queue_btn.pack(side="left", padx=5)
+clear_queue_btn.pack(side="left", padx=5)
+cancel_btn.pack(side="left", padx=5)
+progress_bar = ctk.CTkProgressBar(app)
+progress_bar.set(0)
+progress_bar.pack(pady=5, padx=20, fill="x")
+progress_label = ctk.CTkLabel(app, text="", font=("Segoe UI", 11))
+progress_label.pack(fill="x", padx=20)
+
 # License Output
 license_label = ctk.CTkLabel(app, text=texts[lang]["license_output"], font=("Segoe UI", 12), anchor="w")
 license_label.pack(pady=(10, 0), fill="x", padx=20)
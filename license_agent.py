@@ -0,0 +1,293 @@
+"""Signing agent: holds the private key in one process and signs over a Unix socket.
+
+Like ``ssh-agent``, the agent decrypts and parses the key once. Tools then
+pass ``agent:<socket>`` (or just ``agent:`` to use ``$LICENSE_AGENT_SOCK``)
+wherever a private key path is expected: ``--key`` of the batch and CLI
+tools, or the GUI's key field. They get signatures without ever reading the
+key file and without paying for key loading.
+
+The protocol is one request per line and one response line per request, in
+order, so a client can pipeline as many requests as it likes:
+
+    <canonical license JSON>   -> OK <hex signature>
+    info                       -> OK {"alg": ..., "fingerprint": ..., "signed": n}
+    anything else              -> ERR <message>
+
+The agent only signs payloads that decode to a license object (with
+``customerId``, ``startDate``, ``endDate`` and ``modules``) and that are
+already in canonical form. It never signs arbitrary bytes. The socket is
+created with mode 0600.
+
+Usage:
+    python license_agent.py serve --key private_key.pem --socket /tmp/license-agent.sock
+    export LICENSE_AGENT_SOCK=/tmp/license-agent.sock
+    python license_batch.py customers.csv --key agent: --out-dir licenses/
+    python license_agent.py sign < payloads.jsonl > signatures.txt
+"""
+import argparse
+import itertools
+import json
+import os
+import selectors
+import socket
+import sys
+
+from license_core import AGENT_PREFIX, canonical_json, key_algorithm, sign_payload
+from license_keys import key_fingerprint, load_private_key
+
+DEFAULT_SOCKET = os.environ.get("LICENSE_AGENT_SOCK", "/tmp/license-agent.sock")
+REQUIRED_FIELDS = ("customerId", "startDate", "endDate", "modules")
+# Requests a client writes before it starts reading responses back
+PIPELINE_WINDOW = 256
+# Longest request line a client may send, and most unsent output kept per client
+MAX_LINE = 1 << 16
+MAX_OUTBUF = 1 << 20
+
+
+def socket_path_for(key_path):
+    """Socket named by an ``agent:<socket>`` key path (``agent:`` alone means the default)."""
+    return key_path[len(AGENT_PREFIX):] or DEFAULT_SOCKET
+
+
+# ---------- SERVER ----------
+class Agent:
+    """The loaded key plus the request handler."""
+
+    def __init__(self, key_path, password=None):
+        self.private_key = load_private_key(key_path, password)
+        self.algorithm = key_algorithm(self.private_key)
+        self.fingerprint = key_fingerprint(self.private_key)
+        self.signed = 0
+
+    def answer(self, line):
+        line = line.strip()
+        if line == b"info":
+            return _ok(json.dumps({"alg": self.algorithm, "fingerprint": self.fingerprint,
+                                   "signed": self.signed}))
+        try:
+            payload = json.loads(line)
+        except ValueError:
+            return b"ERR not a license payload\n"
+        if not isinstance(payload, dict) or any(f not in payload for f in REQUIRED_FIELDS) \
+                or "signature" in payload:
+            return b"ERR not a license payload\n"
+        if canonical_json(payload).encode("utf-8") != line:
+            return b"ERR payload is not canonical JSON\n"
+        self.signed += 1
+        return _ok(sign_payload(self.private_key, line).hex())
+
+
+def _ok(text):
+    return b"OK " + text.encode("utf-8") + b"\n"
+
+
+class _Client:
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbuf = b""
+        self.outbuf = b""
+
+
+def serve(agent, socket_path=DEFAULT_SOCKET):
+    """Run the event loop until interrupted."""
+    sel = selectors.DefaultSelector()
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Nobody but the owner may connect; set before bind so there is no window
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    server.listen(128)
+    server.setblocking(False)
+    sel.register(server, selectors.EVENT_READ, None)
+    try:
+        while True:
+            for key, events in sel.select():
+                if key.data is None:
+                    conn, _ = server.accept()
+                    conn.setblocking(False)
+                    sel.register(conn, selectors.EVENT_READ, _Client(conn))
+                else:
+                    _service_client(sel, key.data, events, agent)
+    finally:
+        sel.close()
+        server.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def _service_client(sel, client, events, agent):
+    if events & selectors.EVENT_READ:
+        try:
+            data = client.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            data = None
+        except OSError:
+            data = b""
+        if data == b"":
+            sel.unregister(client.sock)
+            client.sock.close()
+            return
+        if data:
+            client.inbuf += data
+            *lines, client.inbuf = client.inbuf.split(b"\n")
+            if len(client.inbuf) > MAX_LINE:
+                # No license payload is this long; drop the client before its
+                # buffer can grow without bound
+                sel.unregister(client.sock)
+                client.sock.close()
+                return
+            client.outbuf += b"".join(agent.answer(line) for line in lines if line.strip())
+    if client.outbuf:
+        try:
+            sent = client.sock.send(client.outbuf)
+            client.outbuf = client.outbuf[sent:]
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            sel.unregister(client.sock)
+            client.sock.close()
+            return
+    # Stop reading from a client that does not read its signatures
+    mask = selectors.EVENT_READ if len(client.outbuf) < MAX_OUTBUF else 0
+    if client.outbuf:
+        mask |= selectors.EVENT_WRITE
+    sel.modify(client.sock, mask, client)
+
+
+# ---------- CLIENT ----------
+class AgentError(Exception):
+    """The agent refused a request or could not be reached."""
+
+
+class AgentClient:
+    """One persistent connection to an agent."""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET):
+        self.socket_path = socket_path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.connect(socket_path)
+        except OSError as e:
+            self._sock.close()
+            raise AgentError(f"Cannot reach signing agent at {socket_path}: {e}")
+        self._file = self._sock.makefile("rwb")
+        self._info = None
+
+    def _read_response(self):
+        """``(ok, text)`` for the next response line."""
+        line = self._file.readline()
+        if not line:
+            raise AgentError("Signing agent closed the connection")
+        status, _, text = line.rstrip(b"\n").partition(b" ")
+        return status == b"OK", text.decode("utf-8", "replace")
+
+    @property
+    def info(self):
+        if self._info is None:
+            self._file.write(b"info\n")
+            self._file.flush()
+            ok, text = self._read_response()
+            if not ok:
+                raise AgentError(text)
+            self._info = json.loads(text)
+        return self._info
+
+    @property
+    def algorithm(self):
+        return self.info["alg"]
+
+    @property
+    def fingerprint(self):
+        return self.info["fingerprint"]
+
+    def sign(self, payload):
+        """Hex signature for one canonical payload (str or bytes)."""
+        return next(self.sign_many([payload]))
+
+    def sign_many(self, payloads):
+        """Yield hex signatures in order, keeping up to ``PIPELINE_WINDOW`` requests in flight."""
+        payloads = iter(payloads)
+        while True:
+            batch = list(itertools.islice(payloads, PIPELINE_WINDOW))
+            if not batch:
+                return
+            self._file.write(b"".join((p.encode("utf-8") if isinstance(p, str) else p) + b"\n"
+                                      for p in batch))
+            self._file.flush()
+            # Read the whole window even if one fails, so the stream stays in step
+            responses = [self._read_response() for _ in batch]
+            for ok, text in responses:
+                if not ok:
+                    raise AgentError(text)
+                yield text
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+
+_clients = {}
+
+
+def client_for(key_path):
+    """Cached client for an ``agent:`` key path, one per process (not shared across fork)."""
+    cache_key = (os.getpid(), socket_path_for(key_path))
+    client = _clients.get(cache_key)
+    if client is None:
+        client = _clients[cache_key] = AgentClient(cache_key[1])
+    return client
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="License signing agent.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="Load a key and sign requests")
+    serve_parser.add_argument("--key", required=True, help="Private key (PEM)")
+    serve_parser.add_argument("--key-password-env", metavar="VAR",
+                              help="Read the private key password from this environment variable")
+    serve_parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    info_parser = sub.add_parser("info", help="Show the agent's key algorithm and fingerprint")
+    info_parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    sign_parser = sub.add_parser("sign", help="Sign license payloads (JSONL on stdin), one signature per line")
+    sign_parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "serve":
+        password = os.environ.get(args.key_password_env) if args.key_password_env else None
+        try:
+            agent = Agent(args.key, password)
+        except Exception as e:
+            print(f"[ERROR] Cannot load {args.key}: {e}", file=sys.stderr)
+            return 1
+        print(f"[INFO] {agent.algorithm} key {agent.fingerprint[:16]} on {args.socket}", file=sys.stderr)
+        print(f"LICENSE_AGENT_SOCK={args.socket}; export LICENSE_AGENT_SOCK;")
+        sys.stdout.flush()
+        try:
+            serve(agent, args.socket)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    try:
+        client = AgentClient(args.socket)
+        if args.command == "info":
+            print(json.dumps(client.info, indent=2))
+            return 0
+        # Re-serialize so any license_data JSON is accepted, not only canonical lines
+        payloads = (canonical_json(json.loads(line)) for line in sys.stdin if line.strip())
+        for signature in client.sign_many(payloads):
+            sys.stdout.write(signature + "\n")
+    except AgentError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
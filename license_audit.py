@@ -0,0 +1,196 @@
+"""Bulk audit of a directory tree of issued ``.lic`` files.
+
+The tree is walked lazily and files are decoded and checked in a process pool,
+a bounded window at a time, so memory does not grow with the number of files.
+Each file becomes one report row (JSONL or CSV) with the license fields and a
+status: ``valid``, ``expiring_soon``, ``expired``, ``not_yet_valid``,
+``bad_signature``, ``malformed`` or ``unreadable``.
+
+Developer license signatures are only checked when ``--public-key`` is given.
+
+Usage:
+    python license_audit.py customers/ --public-key public_key.pem --format csv --output report.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+from collections import Counter
+from datetime import date, timedelta
+
+from license_keys import load_public_key
+from license_verify import (
+    BAD_SIGNATURE,
+    COMPANY_FIELDS,
+    DEVELOPER,
+    DEVELOPER_FIELDS,
+    MALFORMED,
+    VALID,
+    MalformedLicense,
+    check_company_signature,
+    check_developer_signature,
+    date_status,
+    decode_license,
+    detect_kind,
+    parse_date,
+    require_fields,
+)
+
+EXPIRING_SOON = "expiring_soon"
+UNREADABLE = "unreadable"
+
+REPORT_FIELDS = ["path", "kind", "status", "customerId", "startDate", "endDate",
+                 "modules", "issuedAt", "error"]
+LICENSE_SUFFIX = ".lic"
+DEFAULT_CHUNK_SIZE = 256
+CHUNKS_IN_FLIGHT = 4
+
+
+def iter_license_files(root, suffix=LICENSE_SUFFIX):
+    """Yield license file paths under ``root`` one directory at a time."""
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        for name in sorted(file_names):
+            if name.endswith(suffix):
+                yield os.path.join(dir_path, name)
+
+
+def audit_content(path, content, public_key=None, today=None, expiring_days=30):
+    """Build the report row for one license file's content."""
+    today = today or date.today()
+    row = dict.fromkeys(REPORT_FIELDS)
+    row["path"] = path
+    try:
+        data = decode_license(content)
+        kind = detect_kind(data)
+        require_fields(data, DEVELOPER_FIELDS if kind == DEVELOPER else COMPANY_FIELDS)
+        modules = data.get("modules")
+        if modules is not None and not (isinstance(modules, list)
+                                        and all(isinstance(m, str) for m in modules)):
+            raise MalformedLicense("Modules must be a list of names")
+    except MalformedLicense as e:
+        row.update(status=MALFORMED, error=str(e))
+        return row
+
+    row.update(kind=kind, customerId=data.get("customerId"), startDate=data["startDate"],
+               endDate=data["endDate"], modules=data.get("modules"), issuedAt=data.get("issuedAt"))
+    if kind == DEVELOPER:
+        signature_ok = public_key is None or check_developer_signature(data, public_key)
+    else:
+        signature_ok = check_company_signature(data)
+    if not signature_ok:
+        row["status"] = BAD_SIGNATURE
+        return row
+
+    status = date_status(data, today)
+    if status == VALID and parse_date(data["endDate"]) - today <= timedelta(days=expiring_days):
+        status = EXPIRING_SOON
+    row["status"] = status
+    return row
+
+
+def audit_file(path, public_key=None, today=None, expiring_days=30):
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    except OSError as e:
+        row = dict.fromkeys(REPORT_FIELDS)
+        row.update(path=path, status=UNREADABLE, error=str(e))
+        return row
+    return audit_content(path, content, public_key, today, expiring_days)
+
+
+# ---------- PARALLEL ----------
+_worker_options = None
+
+
+def _init_worker(public_key_path, today, expiring_days):
+    # The parent already loaded this key, so this only fills the per-process cache
+    global _worker_options
+    public_key = load_public_key(public_key_path) if public_key_path else None
+    _worker_options = (public_key, today, expiring_days)
+
+
+def _audit_in_worker(path):
+    return audit_file(path, *_worker_options)
+
+
+def run_audit(paths, public_key_path=None, today=None, expiring_days=30,
+              workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one report row per path, in walk order.
+
+    The public key is loaded here first: a worker whose initializer raises is
+    respawned by the pool forever, so a bad key must fail before the pool exists.
+    """
+    today = today or date.today()
+    public_key = load_public_key(public_key_path) if public_key_path else None
+    if workers <= 1:
+        for path in paths:
+            yield audit_file(path, public_key, today, expiring_days)
+        return
+    paths = iter(paths)
+    window = workers * chunk_size * CHUNKS_IN_FLIGHT
+    with multiprocessing.Pool(workers, _init_worker,
+                              (public_key_path, today, expiring_days)) as pool:
+        while True:
+            batch = list(itertools.islice(paths, window))
+            if not batch:
+                break
+            yield from pool.imap(_audit_in_worker, batch, chunk_size)
+
+
+def write_report(rows, out, fmt="jsonl"):
+    """Stream report rows to ``out`` and return a Counter of statuses."""
+    counts = Counter()
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+    for row in rows:
+        counts[row["status"]] += 1
+        if fmt == "csv":
+            writer.writerow({**row, "modules": ";".join(row["modules"] or [])})
+        else:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return counts
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Audit a directory tree of .lic files.")
+    parser.add_argument("root", help="Directory to scan")
+    parser.add_argument("--public-key", help="Public key (PEM) to check developer signatures")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--output", help="Report file (default: stdout)")
+    parser.add_argument("--expiring-days", type=int, default=30,
+                        help="Valid licenses ending within this many days are expiring_soon")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Decoding processes; 0 uses every CPU (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+    if args.public_key:
+        try:
+            load_public_key(args.public_key)
+        except Exception as e:
+            print(f"[ERROR] Cannot load public key {args.public_key}: {e}", file=sys.stderr)
+            return 1
+    rows = run_audit(iter_license_files(args.root), args.public_key, None,
+                     args.expiring_days, workers, max(1, args.chunk_size))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            counts = write_report(rows, out, args.format)
+    else:
+        counts = write_report(rows, sys.stdout, args.format)
+    summary = ", ".join(f"{status}={n}" for status, n in sorted(counts.items()))
+    print(f"[INFO] Scanned {sum(counts.values())} file(s): {summary or 'none'}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,684 @@
+"""Headless batch issuing of developer licenses from a CSV or JSONL manifest.
+
+Each manifest row carries ``customerId``, ``startDate``, ``endDate`` and
+``modules``, and optionally a ``key`` column naming the PEM to sign that row
+with (defaults to ``--key``). In CSV the modules column is separated by ``;``;
+in JSONL it may be a list or a ``;`` separated string. Rows are streamed one at
+a time, so memory stays flat regardless of the manifest size.
+
+With ``--workers N`` rows are signed by a process pool. Each worker parses the
+key once (the key cache lives per process) and rows are sent out in chunks;
+results come back in manifest order. With an ``agent:`` key the pool is not
+used: rows are signed by the agent, a pipelined window of requests at a time.
+
+With ``--incremental`` the run works like ``make``: a state file in the
+output directory remembers, per output file, a hash of the row's
+``license_data`` plus the signing key's fingerprint, and the file's mtime and
+size. Rows whose hash still matches an untouched file are skipped without
+signing, so unchanged licenses keep their bytes (and random prefix).
+
+Every run writes per-stage timings (see ``license_metrics``) to
+``<out-dir>/license-metrics.prom`` and ``.json`` (``<bundle>.metrics.*`` for
+bundles), or under ``--metrics PREFIX``. ``--profile PREFIX`` also dumps
+cProfile stats and collapsed stacks.
+
+With ``--shard K/N`` the run only issues the rows whose customerId hashes to
+shard K of N (sha256, so every host agrees), and writes an issuance report
+(``--report``) that ``license_shard.py merge`` combines with the other shards'.
+
+Usage:
+    python license_batch.py customers.csv --key private_key.pem --out-dir licenses/
+    python license_batch.py customers.csv --key private_key.pem --out-dir licenses/ --incremental
+    python license_batch.py customers.csv --key private_key.pem --out-dir shard1/ --shard 1/4
+"""
+import argparse
+import csv
+import functools
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+
+from license_core import (
+    AGENT_PREFIX,
+    ALGORITHMS,
+    AVAILABLE_MODULES,
+    License,
+    LicenseError,
+    finish_license,
+    generate_signature_with_private_key,
+    prepare_license,
+    resolve_algorithm,
+    save_license_file,
+)
+from license_bundle import BundleWriter, check_customer
+from license_keys import default_cache, key_fingerprint, load_private_key
+from license_metrics import Profiler, metrics, timed
+from license_ledger import Ledger, check_entry
+
+MANIFEST_FIELDS = ("customerId", "startDate", "endDate", "modules")
+MODULE_SEPARATOR = ";"
+DEFAULT_NAME = "{customerId}.lic"
+DEFAULT_CHUNK_SIZE = 64
+# Chunks kept in flight per worker; bounds how much of the manifest is buffered
+CHUNKS_IN_FLIGHT = 4
+STATE_FILE = ".issue-state.json"
+STATE_VERSION = 2
+METRICS_NAME = "license-metrics"
+SHARD_REPORT = "shard-{k}-of-{n}.report.jsonl"
+REPORT_VERSION = 2
+
+
+def parse_modules(value):
+    """Accept a list of module names or a ``;`` separated string."""
+    if isinstance(value, list):
+        return [str(m).strip() for m in value if str(m).strip()]
+    return [m.strip() for m in (value or "").split(MODULE_SEPARATOR) if m.strip()]
+
+
+def normalize_row(row):
+    """Pick the manifest fields out of a raw row and clean them up."""
+    return {
+        "customerId": str(row.get("customerId") or "").strip(),
+        "startDate": str(row.get("startDate") or "").strip(),
+        "endDate": str(row.get("endDate") or "").strip(),
+        "modules": parse_modules(row.get("modules")),
+        "key": str(row.get("key") or "").strip(),
+    }
+
+
+def _bad_row(message):
+    # Stands in for a manifest row that could not be parsed; prepare_row fails it
+    row = normalize_row({})
+    row["error"] = message
+    return row
+
+
+def read_manifest(manifest_path):
+    """Yield normalized rows from a ``.csv`` or ``.jsonl`` manifest, one at a time.
+
+    A row that cannot be parsed is yielded with an ``error`` key, so it fails
+    on its own like any other bad row instead of ending the run.
+    """
+    is_csv = manifest_path.lower().endswith(".csv")
+    with open(manifest_path, "r", encoding="utf-8", newline="") as f:
+        if is_csv:
+            reader = csv.DictReader(f)
+            while True:
+                try:
+                    row = next(reader)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    yield _bad_row(f"Bad CSV row: {e}")
+                    continue
+                yield normalize_row(row)
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError("not a JSON object")
+                except ValueError as e:
+                    yield _bad_row(f"Bad JSON row: {e}")
+                    continue
+                yield normalize_row(record)
+
+
+def file_digest(path):
+    """Hex sha256 of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def signing_fingerprint(key_path, password=None):
+    """Public key fingerprint of a key file or ``agent:`` key (see ``key_fingerprint``)."""
+    if key_path.startswith(AGENT_PREFIX):
+        from license_agent import client_for
+        return client_for(key_path).fingerprint
+    return key_fingerprint(load_private_key(key_path, password))
+
+
+def output_path_for(row, out_dir, name_template=DEFAULT_NAME):
+    """Resolve the output file for a row, refusing names that escape ``out_dir``."""
+    try:
+        file_name = name_template.format_map(row)
+    except (KeyError, IndexError, AttributeError, ValueError) as e:
+        raise LicenseError("error_customer", f"Cannot fill name template {name_template!r}: {e!r}")
+    if os.path.basename(file_name) != file_name or file_name in ("", ".", ".."):
+        raise LicenseError("error_customer", f"Invalid output name: {file_name!r}")
+    return os.path.join(out_dir, file_name)
+
+
+def prepare_row(row, key_path, password=None, algorithm=None):
+    """Validate one manifest row and return the ``License`` its key will sign."""
+    if "error" in row:
+        raise LicenseError("error_format", row["error"])
+    unknown = [m for m in row["modules"] if m not in AVAILABLE_MODULES]
+    if unknown:
+        raise LicenseError("error_modules", f"Unknown module(s): {', '.join(unknown)}")
+    return prepare_license(
+        row["customerId"], row["key"] or key_path, row["startDate"], row["endDate"],
+        row["modules"], password, algorithm
+    )
+
+
+def sign_row(row, key_path, password=None, algorithm=None):
+    """Sign one manifest row and return the encoded license."""
+    key_path = row["key"] or key_path
+    record = prepare_row(row, key_path, password, algorithm)
+    try:
+        signature = generate_signature_with_private_key(record, key_path, password)
+    except Exception as e:
+        raise LicenseError("error_private_key", str(e))
+    return finish_license(record, signature)
+
+
+def check_row(row, file_path, ledger=False, bundle=None):
+    """Raise LicenseError for a row whose license could not be recorded afterwards.
+
+    Runs before signing, so such a row fails on its own instead of aborting
+    the run once its license is already written. ``bundle`` is the bundle
+    path when the licenses go into one instead of ``.lic`` files.
+    """
+    try:
+        if bundle is not None:
+            check_customer(row["customerId"])
+            file_path = bundle_entry_path(bundle, row["customerId"])
+        if ledger:
+            check_entry(row["customerId"], row["modules"], file_path)
+    except ValueError as e:
+        raise LicenseError("error_customer", str(e))
+
+
+def bundle_entry_path(bundle_path, customer_id):
+    """Path recorded in the ledger for a license stored in a bundle."""
+    return f"{bundle_path}#{customer_id}"
+
+
+def issue_row(row, key_path, out_dir, name_template=DEFAULT_NAME, password=None,
+              algorithm=None, check=None):
+    """Sign one manifest row and write its ``.lic`` file. Returns the file path."""
+    file_path = output_path_for(row, out_dir, name_template)
+    if check is not None:
+        check(row, file_path)
+    encoded = sign_row(row, key_path, password, algorithm)
+    save_license_file(file_path, encoded)
+    return file_path
+
+
+def issue_item(item, key_path, out_dir, name_template=DEFAULT_NAME, password=None,
+               algorithm=None, check=None):
+    """Issue one ``(line, row)`` pair and return ``(line, row, path, error)``.
+
+    Without an ``out_dir`` nothing is written and the encoded license takes the
+    place of the path (used for bundles). ``check(row, path)`` (see
+    ``check_row``) may reject the row before it is signed.
+    """
+    line, row = item
+    if "error" in row:
+        return line, row, None, row["error"]
+    try:
+        if out_dir is None:
+            if check is not None:
+                check(row, None)
+            return line, row, sign_row(row, key_path, password, algorithm), None
+        return line, row, issue_row(row, key_path, out_dir, name_template, password,
+                                    algorithm, check), None
+    except (LicenseError, OSError) as e:
+        # OSError: the license could not be written (permissions, disk full, ...)
+        return line, row, None, str(e)
+
+
+# ---------- INCREMENTAL ----------
+class IssueState:
+    """Input hashes of the licenses written by earlier runs, keyed by file name.
+
+    Names are relative to the output directory, so ``--out-dir inc``,
+    ``./inc`` and an absolute path share one state. Only entries seen in the
+    current run are saved, so customers dropped from the manifest and rows
+    that failed fall out of the state.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.out_dir = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        if data.get("version") == STATE_VERSION:
+            self._previous = data["entries"]
+        elif data.get("version") == 1:
+            # Version 1 keyed entries by out_dir joined with the name, as typed
+            self._previous = {os.path.basename(k): v for k, v in data["entries"].items()}
+        else:
+            self._previous = {}
+        self._entries = {}
+        self._pending = {}
+        self._keys = {}
+        self.skipped = []
+
+    def _key_info(self, key_path, password, algorithm):
+        """``(algorithm, fingerprint)`` per key file, or None if the key is unusable."""
+        if key_path not in self._keys:
+            try:
+                detected = resolve_algorithm(key_path, password, algorithm)
+                self._keys[key_path] = (detected, signing_fingerprint(key_path, password))
+            except LicenseError:
+                self._keys[key_path] = None
+        return self._keys[key_path]
+
+    def input_hash(self, row, key_path, password=None, algorithm=None):
+        key_info = self._key_info(row["key"] or key_path, password, algorithm)
+        if key_info is None:
+            return None
+        detected, fingerprint = key_info
+        record = License(row["customerId"], row["startDate"], row["endDate"], row["modules"],
+                         detected)
+        return hashlib.sha256(record.canonical + b"\n" + fingerprint.encode("ascii")).hexdigest()
+
+    def _name(self, file_path):
+        return os.path.normpath(os.path.relpath(file_path, self.out_dir))
+
+    def is_current(self, file_path, digest):
+        entry = self._previous.get(self._name(file_path))
+        if entry is None or entry[0] != digest:
+            return False
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return False
+        return entry[1] == st.st_mtime_ns and entry[2] == st.st_size
+
+    def filter_items(self, items, key_path, out_dir, name_template=DEFAULT_NAME, password=None,
+                     algorithm=None):
+        """Yield only the ``(line, row)`` items whose inputs changed; remember the rest."""
+        self.out_dir = out_dir
+        for line, row in items:
+            if "error" in row:
+                yield line, row
+                continue
+            try:
+                file_path = output_path_for(row, out_dir, name_template)
+            except LicenseError:
+                yield line, row
+                continue
+            digest = self.input_hash(row, key_path, password, algorithm)
+            if digest is not None and self.is_current(file_path, digest):
+                name = self._name(file_path)
+                self._entries[name] = self._previous[name]
+                self.skipped.append((line, row, file_path))
+                continue
+            if digest is not None:
+                self._pending[self._name(file_path)] = digest
+            yield line, row
+
+    def record(self, file_path):
+        """Note that ``file_path`` was (re)written for its pending input hash."""
+        name = self._name(file_path)
+        digest = self._pending.pop(name, None)
+        if digest is not None:
+            st = os.stat(file_path)
+            self._entries[name] = [digest, st.st_mtime_ns, st.st_size]
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": STATE_VERSION, "entries": self._entries}, f,
+                      separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+
+# ---------- SHARDING ----------
+def shard_of(customer_id, shards):
+    """0-based shard of a customer; a stable hash, so it is the same on every host and run."""
+    digest = hashlib.sha256(customer_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shards
+
+
+def parse_shard(value):
+    """argparse type for ``K/N`` with 1 <= K <= N."""
+    try:
+        k, n = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got {value!r}")
+    if not 1 <= k <= n:
+        raise argparse.ArgumentTypeError(f"shard {value} is out of range")
+    return k, n
+
+
+class IssueReport:
+    """JSONL issuance report: a header line, then one line per manifest row.
+
+    The header carries the manifest's sha256, the shard and the fingerprint of
+    the run's ``--key``, so a merge can tell whether every shard ran over the
+    same manifest with the same key. Row lines hold the output file name and
+    its sha256. The report is renamed into place on ``close()``.
+    """
+
+    def __init__(self, path, manifest_path, shard=None, key=None):
+        self.path = path
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        self._write({"report": REPORT_VERSION, "manifest": file_digest(manifest_path),
+                     "shard": list(shard) if shard else None, "key": key})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def add(self, line, row, status, path=None, error=None):
+        """Record one row; ``status`` is ``issued``, ``unchanged`` or ``failed``."""
+        self._write({
+            "line": line,
+            "customerId": row["customerId"],
+            "status": status,
+            "file": os.path.basename(path) if path else None,
+            "sha256": file_digest(path) if path else None,
+            "error": error,
+        })
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.unlink(self._tmp_path)
+
+
+# ---------- AGENT ----------
+def _run_agent(items, key_path, out_dir, name_template, password, algorithm, check):
+    """Issue rows through the agent at ``key_path`` with a window of requests in flight.
+
+    Signing one row per round trip leaves the agent idle while the row is
+    encoded and written, so rows are prepared a window at a time and signed
+    with ``AgentClient.sign_many``. Rows with a key column of their own, or
+    that could not be parsed, go through ``issue_item``.
+    """
+    from license_agent import PIPELINE_WINDOW, AgentError, client_for
+
+    while True:
+        batch = list(itertools.islice(items, PIPELINE_WINDOW))
+        if not batch:
+            return
+        results = [None] * len(batch)
+        pending = []
+        for i, (line, row) in enumerate(batch):
+            if "error" in row or row["key"] and row["key"] != key_path:
+                results[i] = issue_item((line, row), key_path, out_dir, name_template, password,
+                                        algorithm, check)
+                continue
+            try:
+                file_path = None
+                if out_dir is not None:
+                    file_path = output_path_for(row, out_dir, name_template)
+                if check is not None:
+                    check(row, file_path)
+                pending.append((i, prepare_row(row, key_path, password, algorithm), file_path))
+            except LicenseError as e:
+                results[i] = line, row, None, str(e)
+        try:
+            with timed("agent_sign"):
+                signatures = list(client_for(key_path).sign_many(
+                    record.canonical for _, record, _ in pending))
+        except (AgentError, OSError):
+            # One refusal fails the whole window; sign those rows one at a time instead
+            # so each gets its own result
+            signatures = None
+        for n, (i, record, file_path) in enumerate(pending):
+            line, row = batch[i]
+            if signatures is None:
+                results[i] = issue_item((line, row), key_path, out_dir, name_template, password,
+                                        algorithm, check)
+                continue
+            encoded = finish_license(record, signatures[n])
+            if file_path is None:
+                results[i] = line, row, encoded, None
+                continue
+            try:
+                save_license_file(file_path, encoded)
+                results[i] = line, row, file_path, None
+            except OSError as e:
+                results[i] = line, row, None, str(e)
+        yield from results
+
+
+# ---------- PARALLEL ----------
+_worker_options = None
+
+
+def _init_worker(key_path, out_dir, name_template, password, algorithm, check):
+    """Pool initializer: remember the run options and warm this worker's key cache."""
+    global _worker_options
+    _worker_options = (key_path, out_dir, name_template, password, algorithm, check)
+    if key_path and not key_path.startswith(AGENT_PREFIX):
+        try:
+            load_private_key(key_path, password)
+        except Exception:
+            # Reported per row by sign_row instead
+            pass
+
+
+def _issue_chunk(chunk):
+    # Ship this worker's stage timings back once per chunk; the parent merges them
+    return [issue_item(item, *_worker_options) for item in chunk], metrics.drain()
+
+
+def _run_parallel(items, key_path, out_dir, name_template, password, algorithm,
+                  workers, chunk_size, check):
+    window = workers * chunk_size * CHUNKS_IN_FLIGHT
+    with multiprocessing.Pool(workers, _init_worker,
+                              (key_path, out_dir, name_template, password, algorithm,
+                               check)) as pool:
+        while True:
+            batch = list(itertools.islice(items, window))
+            if not batch:
+                break
+            chunks = [batch[i:i + chunk_size] for i in range(0, len(batch), chunk_size)]
+            for results, worker_metrics in pool.imap(_issue_chunk, chunks):
+                metrics.merge(worker_metrics)
+                yield from results
+
+
+def run_batch(rows, key_path, out_dir, name_template=DEFAULT_NAME, password=None,
+              workers=1, chunk_size=DEFAULT_CHUNK_SIZE, algorithm=None, state=None, shard=None,
+              check=None):
+    """Issue every row and yield ``(line, row, path, error)`` in manifest order.
+
+    Bad rows do not stop the run; their error message is yielded instead. With
+    ``workers > 1`` the rows are signed in a process pool, a bounded window of
+    ``workers * chunk_size * CHUNKS_IN_FLIGHT`` rows at a time. With an
+    ``IssueState``, unchanged rows are skipped (see ``state.skipped``) and every
+    written file is recorded in it. ``out_dir=None`` yields encoded licenses
+    instead of writing files. With ``shard=(k, n)`` only the rows of shard k
+    (1-based) are issued; line numbers still count every manifest row.
+    ``check`` is passed on to ``issue_item`` (it must pickle for ``workers > 1``).
+    """
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+    items = enumerate(rows, start=1)
+    if shard is not None:
+        k, n = shard
+        items = ((line, row) for line, row in items if shard_of(row["customerId"], n) == k - 1)
+    if state is not None:
+        items = state.filter_items(items, key_path, out_dir, name_template, password, algorithm)
+        for result in _run_items(items, key_path, out_dir, name_template, password, algorithm,
+                                 workers, chunk_size, check):
+            if result[3] is None:
+                state.record(result[2])
+            yield result
+    else:
+        yield from _run_items(items, key_path, out_dir, name_template, password, algorithm,
+                              workers, chunk_size, check)
+
+
+def _run_items(items, key_path, out_dir, name_template, password, algorithm, workers,
+               chunk_size, check):
+    if key_path and key_path.startswith(AGENT_PREFIX):
+        # The agent does the signing; more processes would only add connections
+        yield from _run_agent(items, key_path, out_dir, name_template, password, algorithm,
+                              check)
+    elif workers > 1:
+        yield from _run_parallel(items, key_path, out_dir, name_template, password,
+                                 algorithm, workers, chunk_size, check)
+    else:
+        for item in items:
+            yield issue_item(item, key_path, out_dir, name_template, password, algorithm,
+                             check)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Issue developer licenses from a manifest.")
+    parser.add_argument("manifest", help="CSV or JSONL file with customerId,startDate,endDate,modules")
+    parser.add_argument("--key", help="Private key (PEM) for rows without a key column")
+    parser.add_argument("--key-password-env", metavar="VAR",
+                        help="Read the private key password from this environment variable")
+    parser.add_argument("--algorithm", choices=ALGORITHMS,
+                        help="Require this signing algorithm (default: detected from the key)")
+    parser.add_argument("--out-dir", default="licenses", help="Directory for the .lic files")
+    parser.add_argument("--name", default=DEFAULT_NAME,
+                        help="Output file name template (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Signing processes; 0 uses every CPU (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows sent to a worker at a time (default: %(default)s)")
+    parser.add_argument("--ledger", help="Record every issued license in this ledger")
+    parser.add_argument("--bundle", metavar="PATH",
+                        help="Write one indexed bundle (see license_bundle.py) instead of .lic files")
+    parser.add_argument("--incremental", nargs="?", const="", metavar="STATE",
+                        help="Skip rows whose inputs are unchanged since the last run "
+                             f"(state file, default: <out-dir>/{STATE_FILE})")
+    parser.add_argument("--show-skipped", action="store_true",
+                        help="With --incremental, list every skipped row")
+    parser.add_argument("--metrics", metavar="PREFIX",
+                        help="Write stage timings to PREFIX.prom and PREFIX.json "
+                             f"(default: <out-dir>/{METRICS_NAME})")
+    parser.add_argument("--no-metrics", action="store_true", help="Do not write stage timings")
+    parser.add_argument("--profile", metavar="PREFIX",
+                        help="Also write PREFIX.pstats (cProfile) and PREFIX.folded (flame graph stacks)")
+    parser.add_argument("--shard", type=parse_shard, metavar="K/N",
+                        help="Only issue the customers of shard K of N (see license_shard.py)")
+    parser.add_argument("--report", metavar="PATH",
+                        help="Write a JSONL issuance report "
+                             f"(default with --shard: <out-dir>/{SHARD_REPORT.format(k='K', n='N')})")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    password = os.environ.get(args.key_password_env) if args.key_password_env else None
+    workers = args.workers or os.cpu_count() or 1
+    ledger = Ledger(args.ledger, auto_reindex=False) if args.ledger else None
+    state = bundle = report = None
+    if args.bundle:
+        if args.incremental is not None or args.shard or args.report:
+            print("[ERROR] --incremental, --shard and --report work on .lic files, not --bundle",
+                  file=sys.stderr)
+            return 2
+        bundle = BundleWriter(args.bundle)
+    elif args.incremental is not None:
+        state = IssueState(args.incremental or os.path.join(args.out_dir, STATE_FILE))
+    report_path = args.report
+    if args.shard and not report_path:
+        k, n = args.shard
+        report_path = os.path.join(args.out_dir, SHARD_REPORT.format(k=k, n=n))
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        fingerprint = None
+        if args.key:
+            try:
+                fingerprint = signing_fingerprint(args.key, password)
+            except Exception:
+                # Every row signed with this key fails and is reported as such
+                pass
+        report = IssueReport(report_path, args.manifest, args.shard, fingerprint)
+    profiler = None
+    if args.profile:
+        if workers > 1:
+            print("[WARNING] --profile only sees this process; use --workers 1 to profile signing",
+                  file=sys.stderr)
+        profiler = Profiler()
+        profiler.start()
+    check = None
+    if ledger is not None or bundle is not None:
+        check = functools.partial(check_row, ledger=ledger is not None, bundle=args.bundle)
+    issued = failed = 0
+    try:
+        for line, row, path, error in run_batch(read_manifest(args.manifest), args.key,
+                                                None if bundle is not None else args.out_dir, args.name,
+                                                password, workers, max(1, args.chunk_size),
+                                                args.algorithm, state, args.shard, check):
+            if error:
+                failed += 1
+                print(f"[ERROR] row {line} ({row['customerId'] or '-'}): {error}", file=sys.stderr)
+                if report is not None:
+                    report.add(line, row, "failed", error=error)
+                continue
+            issued += 1
+            if report is not None:
+                report.add(line, row, "issued", path)
+            if bundle is not None:
+                content = path
+                bundle.add(row["customerId"], content)
+                path = bundle_entry_path(args.bundle, row["customerId"])
+            elif ledger is not None:
+                with open(path, "rb") as f:
+                    content = f.read()
+            if ledger is not None:
+                with timed("ledger"):
+                    ledger.record_license(content, path)
+    except BaseException:
+        if bundle is not None:
+            bundle.abort()
+        if report is not None:
+            report.abort()
+        raise
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    if bundle is not None:
+        bundle.close()
+    if ledger is not None:
+        ledger.reindex()
+    if state is not None:
+        state.save()
+        if args.show_skipped:
+            for line, row, path in state.skipped:
+                print(f"[SKIP] row {line} ({row['customerId']}): unchanged -> {path}")
+        print(f"[INFO] Skipped {len(state.skipped)} unchanged license(s)")
+        metrics.incr("skipped", len(state.skipped))
+    if report is not None:
+        if state is not None:
+            for line, row, path in state.skipped:
+                report.add(line, row, "unchanged", path)
+        report.close()
+        print(f"[INFO] Issuance report -> {report.path}")
+    metrics.incr("issued", issued)
+    metrics.incr("failed", failed)
+    if not args.no_metrics:
+        prefix = args.metrics or (args.bundle + ".metrics" if bundle is not None
+                                  else os.path.join(args.out_dir, METRICS_NAME))
+        metrics.write(prefix)
+        stages = metrics.summary()["stages"]
+        top = ", ".join(f"{name} {s['share']:.0%}" for name, s in list(stages.items())[:4])
+        print(f"[INFO] Stage timings -> {prefix}.prom/.json ({top})")
+    if profiler is not None:
+        print(f"[INFO] Profile -> {', '.join(profiler.write(args.profile))}")
+    print(f"[INFO] Issued {issued} license(s), {failed} failed -> {args.bundle or args.out_dir}")
+    if workers == 1:
+        print(f"[INFO] Key cache: {default_cache.stats()}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""Benchmarks for the license generation and verification pipeline.
+
+Each stage is timed on its own (PEM load, canonical JSON, RSA sign per key
+size, Ed25519 / P-256 sign, random prefix, base64, file write, verify), then the end-to-end batch
+throughput for several batch sizes and module list lengths. Results are
+written as JSON so two runs can be compared with ``--compare``.
+
+Usage:
+    python license_bench.py --output bench.json
+    python license_bench.py --output new.json --compare bench.json
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa
+
+from license_batch import run_batch
+from license_core import (
+    AVAILABLE_MODULES,
+    DATE_FORMAT,
+    License,
+    build_license_data,
+    canonical_json,
+    encode_license,
+    generate_random_hex_prefix,
+    save_license_file,
+    sign_payload,
+)
+from license_keys import load_private_key_file
+from license_verify import VerificationCache, verify_developer_license
+
+KEY_SIZES = (2048, 3072, 4096)
+BATCH_SIZES = (1, 100, 10000)
+QUICK_BATCH_SIZES = (1, 100, 1000)
+REGRESSION_THRESHOLD = 1.10
+
+
+def time_op(fn, number, repeat=5):
+    """Per-call seconds for ``fn`` over ``repeat`` runs of ``number`` calls."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - start) / number)
+    return {"min_us": min(runs) * 1e6, "median_us": statistics.median(runs) * 1e6,
+            "number": number, "repeat": repeat}
+
+
+def write_key_pair(key, directory, name):
+    """Write ``name.pem`` / ``name.pub.pem`` and return their paths."""
+    private_path = os.path.join(directory, f"{name}.pem")
+    public_path = os.path.join(directory, f"{name}.pub.pem")
+    with open(private_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM,
+                                  serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+    with open(public_path, "wb") as f:
+        f.write(key.public_key().public_bytes(serialization.Encoding.PEM,
+                                              serialization.PublicFormat.SubjectPublicKeyInfo))
+    return private_path, public_path
+
+
+def _window():
+    """A validity window around today, so verification exercises the valid path."""
+    today = date.today()
+    return (today - timedelta(days=30)).strftime(DATE_FORMAT), \
+        (today + timedelta(days=335)).strftime(DATE_FORMAT)
+
+
+def sample_license(modules=None):
+    return build_license_data("BENCH-CUSTOMER", *_window(), modules or AVAILABLE_MODULES)
+
+
+def bench_stages(keys, workdir, quick=False):
+    n = 20 if quick else 100
+    data = sample_license()
+    payload = canonical_json(data).encode("utf-8")
+    results = {
+        "canonical_json": time_op(lambda: canonical_json(data), n * 100),
+        "random_prefix": time_op(lambda: generate_random_hex_prefix(), n * 100),
+    }
+    signature = None
+    for bits, (key, private_path, public_path) in keys.items():
+        results[f"pem_load_{bits}"] = time_op(lambda: load_private_key_file(private_path), n // 4 or 1)
+        results[f"rsa_sign_{bits}"] = time_op(
+            lambda: key.sign(payload, padding.PKCS1v15(), hashes.SHA256()), n)
+        signature = generate_random_hex_prefix() + key.sign(
+            payload, padding.PKCS1v15(), hashes.SHA256()).hex()
+        encoded = encode_license(data, signature)
+        results[f"verify_uncached_{bits}"] = time_op(
+            lambda: verify_developer_license(encoded, public_path, cache=VerificationCache(0)), n)
+        cache = VerificationCache()
+        results[f"verify_cached_{bits}"] = time_op(
+            lambda: verify_developer_license(encoded, public_path, cache=cache), n * 10)
+    for name, key in (("ed25519", ed25519.Ed25519PrivateKey.generate()),
+                      ("p256", ec.generate_private_key(ec.SECP256R1()))):
+        results[f"sign_{name}"] = time_op(lambda: sign_payload(key, payload), n * 10)
+    signed = canonical_json({**data, "signature": signature}).encode("utf-8")
+    results["base64_encode"] = time_op(lambda: base64.b64encode(signed), n * 100)
+    # Serialize + attach signature + base64, the old dict path against the License record
+    results["encode_dict"] = time_op(lambda: encode_license(data, signature), n * 100)
+    results["encode_record"] = time_op(
+        lambda: License(data["customerId"], data["startDate"], data["endDate"],
+                        data["modules"]).encode(signature), n * 100)
+    encoded = encode_license(data, signature)
+    out_path = os.path.join(workdir, "stage.lic")
+    results["file_write"] = time_op(lambda: save_license_file(out_path, encoded), n * 10)
+    return results
+
+
+def _rows(count, modules):
+    start_date, end_date = _window()
+    for i in range(count):
+        yield {"customerId": f"C{i:06d}", "startDate": start_date, "endDate": end_date,
+               "modules": modules, "key": ""}
+
+
+def bench_batch(private_path, workdir, sizes, module_counts):
+    """Issue ``count`` licenses per size and module count; raises RuntimeError if any row fails.
+
+    A failing row is cheap, so counting it would report a broken run as fast.
+    """
+    results = {}
+    for count in sizes:
+        for module_count in module_counts:
+            out_dir = os.path.join(workdir, f"batch_{count}_{module_count}")
+            start = time.perf_counter()
+            done = 0
+            errors = []
+            for _, _, _, error in run_batch(_rows(count, AVAILABLE_MODULES[:module_count]),
+                                            private_path, out_dir):
+                if error is None:
+                    done += 1
+                else:
+                    errors.append(error)
+            elapsed = time.perf_counter() - start
+            if errors:
+                raise RuntimeError(f"{len(errors)} of {count} batch rows failed: {errors[0]}")
+            results[f"batch_{count}_modules_{module_count}"] = {
+                "licenses": done, "seconds": elapsed, "per_second": done / elapsed}
+    return results
+
+
+def compare(current, previous, threshold=REGRESSION_THRESHOLD):
+    """Print per-benchmark ratios and return the names that regressed."""
+    regressions = []
+    for section, metric, higher_is_better in (("stages", "min_us", False),
+                                              ("batch", "per_second", True)):
+        for name, result in current[section].items():
+            old = previous.get(section, {}).get(name)
+            if not old:
+                continue
+            ratio = old[metric] / result[metric] if higher_is_better else result[metric] / old[metric]
+            flag = "REGRESSION" if ratio > threshold else ""
+            print(f"{section}.{name:<32} {ratio:6.2f}x {flag}")
+            if flag:
+                regressions.append(f"{section}.{name}")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the license pipeline.")
+    parser.add_argument("--output", default="bench.json", help="Where to write the results")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    parser.add_argument("--key-sizes", type=int, nargs="+", default=list(KEY_SIZES))
+    parser.add_argument("--quick", action="store_true",
+                        help="Fewer iterations and batches up to 1000 licenses")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = QUICK_BATCH_SIZES if args.quick else BATCH_SIZES
+    module_counts = sorted({1, len(AVAILABLE_MODULES) // 2, len(AVAILABLE_MODULES)})
+    with tempfile.TemporaryDirectory(prefix="license-bench-") as workdir:
+        keys = {}
+        for bits in args.key_sizes:
+            key = rsa.generate_private_key(public_exponent=65537, key_size=bits)
+            keys[bits] = (key, *write_key_pair(key, workdir, f"rsa{bits}"))
+        stages = bench_stages(keys, workdir, args.quick)
+        smallest = keys[min(keys)][1]
+        try:
+            batch = bench_batch(smallest, workdir, sizes, module_counts)
+        except RuntimeError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            return 1
+
+    report = {
+        "createdAt": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "stages": stages,
+        "batch": batch,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for name, result in stages.items():
+        print(f"{name:<24} {result['min_us']:12.2f} us")
+    for name, result in batch.items():
+        print(f"{name:<32} {result['per_second']:10.0f} licenses/s")
+    print(f"[INFO] Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f))
+        if regressions:
+            print(f"[WARNING] {len(regressions)} regression(s)", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""Indexed bundle of encoded licenses: one file instead of one ``.lic`` per customer.
+
+Layout (big-endian)::
+
+    header   magic "GLBN", version B, entry count Q, index offset Q
+    data     the encoded licenses, back to back, exactly as ``.lic`` files hold them
+    index    (customerId 64s NUL padded, offset Q, length I) per entry, sorted by customerId
+
+Readers memory-map the bundle and binary-search the index, so pulling one
+license out touches the header, ~log2(n) index entries and that license's
+bytes. If a customer is added twice, the last license wins; the earlier bytes
+stay in the data section but are no longer indexed.
+
+Usage:
+    python license_batch.py customers.csv --key private_key.pem --bundle licenses.bundle
+    python license_bundle.py list licenses.bundle
+    python license_bundle.py extract licenses.bundle --customer TARENJ --output license.lic
+    python license_bundle.py extract licenses.bundle --all --out-dir licenses/
+    python license_bundle.py pack licenses/ --output licenses.bundle
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+
+from license_compact import is_compact
+from license_core import save_license_file
+
+MAGIC = b"GLBN"
+VERSION = 1
+HEADER = struct.Struct(">4sBQQ")
+ENTRY = struct.Struct(">64sQI")
+CUSTOMER_BYTES = 64
+
+
+def _customer_key(customer_id):
+    raw = customer_id.encode("utf-8")
+    if not raw or len(raw) > CUSTOMER_BYTES:
+        raise ValueError(f"customerId must be 1-{CUSTOMER_BYTES} bytes: {customer_id!r}")
+    return raw.ljust(CUSTOMER_BYTES, b"\0")
+
+
+def check_customer(customer_id):
+    """Raise ValueError if ``customer_id`` cannot be a bundle index key."""
+    _customer_key(customer_id)
+
+
+class BundleWriter:
+    """Stream licenses into a new bundle; the index is written on ``close()``.
+
+    The bundle is built next to ``path`` and renamed into place, so readers
+    never see a half-written file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        self._offset = HEADER.size
+        self._index = {}
+
+    def add(self, customer_id, content):
+        """Append one encoded license (str or bytes) for ``customer_id``."""
+        key = _customer_key(customer_id)
+        data = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+        self._file.write(data)
+        self._index[key] = (self._offset, len(data))
+        self._offset += len(data)
+
+    def __len__(self):
+        return len(self._index)
+
+    def close(self):
+        if self._file is None:
+            return
+        entries = sorted(self._index.items())
+        self._file.write(b"".join(ENTRY.pack(key, offset, length)
+                                  for key, (offset, length) in entries))
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, len(entries), self._offset))
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Drop the partial bundle and leave any existing one untouched."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.unlink(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class Bundle:
+    """Memory-mapped, read-only view of a bundle."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self._count, self._index_offset = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic, version = None, None
+        if magic != MAGIC or version != VERSION or \
+                self._index_offset + self._count * ENTRY.size != len(self._map):
+            self._map.close()
+            raise ValueError(f"{path} is not a license bundle")
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, i):
+        return ENTRY.unpack_from(self._map, self._index_offset + i * ENTRY.size)
+
+    def _find(self, customer_id):
+        key = _customer_key(customer_id)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            entry_key, offset, length = self._entry(lo)
+            if entry_key == key:
+                return offset, length
+        return None
+
+    def __contains__(self, customer_id):
+        return self._find(customer_id) is not None
+
+    def get(self, customer_id):
+        """The encoded license for ``customer_id`` as bytes, or None."""
+        found = self._find(customer_id)
+        if found is None:
+            return None
+        offset, length = found
+        return self._map[offset:offset + length]
+
+    def customers(self):
+        """Every customerId in the bundle, sorted."""
+        return [self._entry(i)[0].rstrip(b"\0").decode("utf-8") for i in range(self._count)]
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def extract_license(bundle, customer_id, output_path):
+    """Write one customer's license as a ``.lic`` file, exactly like the GUI's Save."""
+    content = bundle.get(customer_id)
+    if content is None:
+        raise KeyError(customer_id)
+    if is_compact(content):
+        with open(output_path, "wb") as f:
+            f.write(content)
+    else:
+        save_license_file(output_path, content.decode("utf-8"))
+    return output_path
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Read, extract or build license bundles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    list_parser = sub.add_parser("list", help="List the customers in a bundle")
+    list_parser.add_argument("bundle")
+    extract = sub.add_parser("extract", help="Write .lic files out of a bundle")
+    extract.add_argument("bundle")
+    which = extract.add_mutually_exclusive_group(required=True)
+    which.add_argument("--customer", action="append", help="Customer to extract (repeatable)")
+    which.add_argument("--all", action="store_true", help="Extract every customer")
+    extract.add_argument("--output", help="Output file for a single --customer (default: license.lic)")
+    extract.add_argument("--out-dir", default=".", help="Directory for {customerId}.lic files")
+    pack = sub.add_parser("pack", help="Bundle existing .lic files")
+    pack.add_argument("directory")
+    pack.add_argument("--output", required=True)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "pack":
+        # Decoding needs the verifier; keep it off the read path
+        from license_audit import iter_license_files
+        from license_verify import MalformedLicense, decode_license
+
+        skipped = 0
+        with BundleWriter(args.output) as writer:
+            for path in iter_license_files(args.directory):
+                with open(path, "rb") as f:
+                    content = f.read()
+                try:
+                    writer.add(decode_license(content)["customerId"], content)
+                except (MalformedLicense, KeyError, ValueError) as e:
+                    skipped += 1
+                    print(f"[WARNING] {path}: {e}", file=sys.stderr)
+            count = len(writer)
+        print(f"[INFO] Bundled {count} license(s), skipped {skipped} -> {args.output}")
+        return 0
+
+    with Bundle(args.bundle) as bundle:
+        if args.command == "list":
+            for customer_id in bundle.customers():
+                print(customer_id)
+            return 0
+        customers = bundle.customers() if args.all else args.customer
+        single = len(customers) == 1 and not args.all
+        if not single:
+            os.makedirs(args.out_dir, exist_ok=True)
+        missing = 0
+        for customer_id in customers:
+            if single:
+                output_path = args.output or "license.lic"
+            else:
+                file_name = f"{customer_id}.lic"
+                if os.path.basename(file_name) != file_name:
+                    missing += 1
+                    print(f"[ERROR] Refusing to write {file_name!r}", file=sys.stderr)
+                    continue
+                output_path = os.path.join(args.out_dir, file_name)
+            try:
+                extract_license(bundle, customer_id, output_path)
+            except KeyError:
+                missing += 1
+                print(f"[ERROR] {customer_id} is not in {args.bundle}", file=sys.stderr)
+                continue
+            print(f"[INFO] {customer_id} -> {output_path}")
+        return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Headless developer license maker, the command line twin of ``core-license_maker_gui.py``.
+
+Uses the same ``license_core.generate_license`` as the GUI, so both produce
+identical licenses. Nothing from Tk is imported and ``cryptography`` is only
+loaded when the key is parsed, so this runs on a box without a display.
+
+Usage:
+    python license_cli.py --customer-id TARENJ --key private_key.pem \\
+        --start-date 2025-01-01 --end-date 2025-12-31 --modules auth admin gps
+    python core-license_maker_gui.py --customer-id TARENJ --key private_key.pem ...
+"""
+import argparse
+import os
+import sys
+
+from license_core import ALGORITHMS, AVAILABLE_MODULES, LicenseError, generate_license, save_license_file
+from license_presets import load_presets
+
+DEFAULT_OUTPUT = "license.lic"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate a developer license without the GUI.")
+    parser.add_argument("--customer-id", required=True)
+    parser.add_argument("--key", required=True, help="Private key (PEM)")
+    parser.add_argument("--key-password-env", metavar="VAR",
+                        help="Read the private key password from this environment variable")
+    parser.add_argument("--algorithm", choices=ALGORITHMS,
+                        help="Require this signing algorithm (default: detected from the key)")
+    parser.add_argument("--start-date", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--end-date", required=True, help="YYYY-MM-DD")
+    modules = parser.add_mutually_exclusive_group()
+    modules.add_argument("--modules", nargs="+", choices=AVAILABLE_MODULES, metavar="MODULE",
+                         help="Granted modules (default: all)")
+    modules.add_argument("--preset", help="Grant the modules of a saved preset (see license_presets.py)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help="Output file, '-' for stdout (default: %(default)s)")
+    parser.add_argument("--ledger", help="Record the issued license in this ledger")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    password = os.environ.get(args.key_password_env) if args.key_password_env else None
+    if args.preset:
+        presets = load_presets()
+        if args.preset not in presets:
+            print(f"[ERROR] Unknown preset {args.preset!r}; have: {', '.join(presets)}", file=sys.stderr)
+            return 2
+        modules = presets[args.preset]
+    else:
+        # Keep catalogue order whatever order the modules were given in
+        chosen = set(args.modules or AVAILABLE_MODULES)
+        modules = [m for m in AVAILABLE_MODULES if m in chosen]
+    try:
+        content = generate_license(args.customer_id, args.key, args.start_date, args.end_date,
+                                   modules, password, args.algorithm)
+    except LicenseError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    if args.output == "-":
+        print(content)
+        return 0
+    save_license_file(args.output, content)
+    if args.ledger:
+        from license_ledger import Ledger
+        Ledger(args.ledger).record_license(content, args.output)
+    print(f"[INFO] License for {args.customer_id} saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
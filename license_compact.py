@@ -0,0 +1,256 @@
+"""Compact binary (v2) encoding of developer licenses.
+
+Layout (big-endian)::
+
+    magic     3s   b"GLC"
+    version   B    2
+    alg       B    0 = RS256, 1 = ES256, 2 = EdDSA
+    start     I    startDate as days since 1970-01-01
+    end       I    endDate as days since 1970-01-01
+    mask_len  B    bytes in the module bitmask
+    mask      ...  bit i set = AVAILABLE_MODULES[i] granted
+    cid_len   B    bytes in customerId (UTF-8)
+    cid       ...
+    sig_len   H    bytes in the raw signature
+    sig       ...
+
+The signature is the same one a v1 license carries (over the canonical v1
+JSON), stored raw instead of hex and without the random prefix. That makes
+the two formats convertible both ways without the private key. The catch is
+that modules must come from ``AVAILABLE_MODULES``, in catalogue order, for the
+v1 JSON to be rebuilt exactly.
+
+Usage:
+    python license_compact.py to-v2 license.lic -o license.v2.lic
+    python license_compact.py to-v1 license.v2.lic -o license.lic
+    python license_compact.py info license.v2.lic
+"""
+import argparse
+import base64
+import json
+import struct
+import sys
+from datetime import date, timedelta
+
+from license_core import (
+    ALGORITHMS,
+    AVAILABLE_MODULES,
+    PREFIX_LENGTH,
+    RS256,
+    LicenseError,
+    build_license_data,
+    encode_license,
+    generate_random_hex_prefix,
+    generate_signature_with_private_key,
+    resolve_algorithm,
+    validate_license_input,
+)
+
+MAGIC = b"GLC"
+VERSION = 2
+HEADER = struct.Struct(">3sBBIIB")
+SIG_LEN = struct.Struct(">H")
+EPOCH = date(1970, 1, 1)
+
+MODULE_BITS = {name: i for i, name in enumerate(AVAILABLE_MODULES)}
+ALGORITHM_IDS = {name: i for i, name in enumerate(ALGORITHMS)}
+
+
+def is_compact(content):
+    return content[:len(MAGIC)] == MAGIC
+
+
+def _days(value):
+    year, month, day = map(int, value.split("-"))
+    days = (date(year, month, day) - EPOCH).days
+    if days < 0:
+        # Day counts are stored unsigned
+        raise ValueError(f"Date {value!r} is before {EPOCH.isoformat()}; it cannot be stored in v2")
+    return days
+
+
+def _date(days):
+    # isoformat() is YYYY-MM-DD, i.e. DATE_FORMAT, and much cheaper than strftime
+    return (EPOCH + timedelta(days=days)).isoformat()
+
+
+def modules_to_mask(modules):
+    """Bitmask for ``modules``; they must be catalogue modules in catalogue order."""
+    mask = 0
+    last = -1
+    for name in modules:
+        bit = MODULE_BITS.get(name)
+        if bit is None:
+            raise ValueError(f"Module not in AVAILABLE_MODULES: {name}")
+        if bit <= last:
+            raise ValueError("Modules must be unique and in AVAILABLE_MODULES order")
+        mask |= 1 << bit
+        last = bit
+    return mask
+
+
+def mask_to_modules(mask):
+    return [name for name, bit in MODULE_BITS.items() if mask >> bit & 1]
+
+
+def has_module(mask, name):
+    """Module check on a decoded license: one dict lookup and a bit test."""
+    bit = MODULE_BITS.get(name)
+    return bit is not None and bool(mask >> bit & 1)
+
+
+def module_mask(blob):
+    """Read only the header and bitmask of v2 bytes, for hot-path module checks."""
+    magic, version, _, _, _, mask_len = HEADER.unpack_from(blob, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a v{VERSION} compact license")
+    return int.from_bytes(blob[HEADER.size:HEADER.size + mask_len], "big")
+
+
+def encode_v2(license_data, signature: bytes):
+    """Pack v1 ``license_data`` (without signature) and a raw signature into v2 bytes."""
+    mask = modules_to_mask(license_data["modules"])
+    mask_bytes = mask.to_bytes((mask.bit_length() + 7) // 8, "big")
+    customer = license_data["customerId"].encode("utf-8")
+    if len(customer) > 255:
+        raise ValueError("customerId is longer than 255 bytes")
+    return b"".join((
+        HEADER.pack(MAGIC, VERSION, ALGORITHM_IDS[license_data.get("alg", RS256)],
+                    _days(license_data["startDate"]), _days(license_data["endDate"]),
+                    len(mask_bytes)),
+        mask_bytes,
+        bytes((len(customer),)), customer,
+        SIG_LEN.pack(len(signature)), signature,
+    ))
+
+
+def decode_v2(blob):
+    """Unpack v2 bytes into ``(license_data, module_mask, raw_signature)``."""
+    try:
+        magic, version, alg_id, start, end, mask_len = HEADER.unpack_from(blob, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a v{VERSION} compact license")
+        offset = HEADER.size
+        mask = int.from_bytes(blob[offset:offset + mask_len], "big")
+        offset += mask_len
+        cid_len = blob[offset]
+        customer = blob[offset + 1:offset + 1 + cid_len].decode("utf-8")
+        offset += 1 + cid_len
+        (sig_len,) = SIG_LEN.unpack_from(blob, offset)
+        offset += SIG_LEN.size
+        signature = bytes(blob[offset:offset + sig_len])
+        if len(signature) != sig_len:
+            raise ValueError("Truncated signature")
+        license_data = build_license_data(customer, _date(start), _date(end),
+                                          mask_to_modules(mask), ALGORITHMS[alg_id])
+    except (struct.error, IndexError, UnicodeDecodeError, OverflowError, ValueError) as e:
+        # OverflowError: a corrupt day count that no date can hold
+        raise ValueError(f"Cannot decode compact license: {e}")
+    return license_data, mask, signature
+
+
+def to_v1_dict(blob, prefix=None):
+    """Decode v2 bytes into the dict a v1 license decodes to.
+
+    v2 has no random prefix; ``prefix`` fills that slot (zeros by default, a
+    fresh random one when converting back to a v1 file).
+    """
+    license_data, _, signature = decode_v2(blob)
+    return {**license_data, "signature": (prefix or "0" * PREFIX_LENGTH) + signature.hex()}
+
+
+def check_dates(license_data):
+    """Raise ValueError unless both dates come back from v2 exactly as signed.
+
+    v2 stores day counts and re-renders them as YYYY-MM-DD, so a date written
+    any other way (``2025-1-5``) would no longer match its signature.
+    """
+    for field in ("startDate", "endDate"):
+        value = license_data[field]
+        if not isinstance(value, str) or _date(_days(value)) != value:
+            raise ValueError(f"{field} {value!r} is not YYYY-MM-DD; it cannot be stored in v2")
+
+
+def v1_to_v2(encoded):
+    """Convert a base64 v1 license into v2 bytes."""
+    data = json.loads(base64.b64decode(encoded))
+    signature = bytes.fromhex(data.pop("signature")[PREFIX_LENGTH:])
+    check_dates(data)
+    blob = encode_v2(data, signature)
+    if decode_v2(blob)[0] != data:
+        raise ValueError("License fields do not survive v2 encoding; keep it as v1")
+    return blob
+
+
+def v2_to_v1(blob):
+    """Convert v2 bytes into a base64 v1 license with a fresh random prefix."""
+    license_data, _, signature = decode_v2(blob)
+    return encode_license(license_data, generate_random_hex_prefix(PREFIX_LENGTH) + signature.hex())
+
+
+def generate_compact_license(customer_id, key_path, start_date, end_date, modules,
+                             password=None, algorithm=None):
+    """Like ``license_core.generate_license`` but returns v2 bytes."""
+    validate_license_input(customer_id, key_path, start_date, end_date, modules)
+    algorithm = resolve_algorithm(key_path, password, algorithm)
+    license_data = build_license_data(customer_id, start_date, end_date, modules, algorithm)
+    try:
+        check_dates(license_data)
+    except ValueError as e:
+        raise LicenseError("error_format", str(e))
+    try:
+        modules_to_mask(license_data["modules"])
+    except ValueError as e:
+        raise LicenseError("error_modules", str(e))
+    try:
+        signature = generate_signature_with_private_key(license_data, key_path, password)
+    except Exception as e:
+        raise LicenseError("error_private_key", str(e))
+    return encode_v2(license_data, bytes.fromhex(signature))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Convert between v1 and compact v2 licenses.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, text in (("to-v2", "Convert a base64 v1 license to v2"),
+                       ("to-v1", "Convert a v2 license to base64 v1"),
+                       ("info", "Show what a v1 or v2 license contains")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument("input")
+        if name != "info":
+            p.add_argument("-o", "--output", required=True)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with open(args.input, "rb") as f:
+        content = f.read()
+    try:
+        if args.command == "to-v2":
+            # Convert first so a refused license leaves no empty output file
+            blob = v1_to_v2(content.strip())
+            with open(args.output, "wb") as f:
+                f.write(blob)
+        elif args.command == "to-v1":
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(v2_to_v1(content))
+        else:
+            if is_compact(content):
+                data = to_v1_dict(content)
+                data["format"] = f"v{VERSION}"
+            else:
+                data = json.loads(base64.b64decode(content.strip()))
+                data["format"] = "v1"
+            data["bytes"] = len(content)
+            print(json.dumps(data, indent=2, ensure_ascii=False))
+            return 0
+    except (ValueError, KeyError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    print(f"[INFO] {args.input} ({len(content)} bytes) -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
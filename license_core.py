@@ -0,0 +1,327 @@
+"""Developer license logic shared by the GUI and the headless tools.
+
+A developer license is the base64 of the compact JSON
+``{customerId, startDate, endDate, modules, signature}`` where the signature is
+a 129 char random hex prefix followed by the hex RSA-SHA256 (PKCS#1 v1.5)
+signature of the compact JSON without the ``signature`` field. This matches
+``src/licence-maker.ts`` byte for byte.
+
+Ed25519 (``EdDSA``) and ECDSA P-256 (``ES256``) keys are supported too. Those
+licenses carry an ``alg`` field inside the signed payload so verifiers know
+which check to run; RSA licenses never have it, keeping the default output
+identical to the TypeScript maker.
+
+``cryptography`` is imported inside the functions that need it, so tools that
+only validate input or build payloads start without paying for it.
+
+``generate_license`` works on a ``License`` record rather than a dict. The
+record serializes itself once; the signed license is that JSON with the
+signature spliced in before the closing brace, so nothing is serialized or
+copied twice.
+"""
+import base64
+import binascii
+import hashlib
+import json
+import secrets
+import sys
+from datetime import datetime
+from json.encoder import encode_basestring
+
+from license_keys import load_private_key
+from license_metrics import timed
+
+# Available modules
+AVAILABLE_MODULES = [
+    "auth",
+    "admin",
+    "personal-space",
+    "gps",
+    "stations",
+    "subscription",
+    "ticket",
+    "user",
+    "ppk",
+    "spp",
+    "static",
+    "calendar",
+    "ion",
+    "ppp"
+]
+
+DATE_FORMAT = "%Y-%m-%d"
+PREFIX_LENGTH = 129
+
+# Signing algorithms; RS256 is the default and is not written into the payload
+RS256 = "RS256"
+ES256 = "ES256"
+EDDSA = "EdDSA"
+ALGORITHMS = (RS256, ES256, EDDSA)
+
+# A key path of "agent:<socket>" signs through license_agent instead of a PEM file
+AGENT_PREFIX = "agent:"
+
+
+class LicenseError(Exception):
+    """Invalid license input. ``code`` is the matching key in the GUI ``texts`` table."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+def generate_random_hex_prefix(length=PREFIX_LENGTH):
+    """Generate a hex-only random string with the exact requested length (matches TS behavior)."""
+    # secrets.token_hex(n) returns 2n hex chars; make slightly longer then trim to exact length
+    hex_str = secrets.token_hex((length // 2) + 1)
+    return hex_str[:length]
+
+
+def canonical_json(data):
+    """Serialize exactly like TypeScript JSON.stringify: no spaces, same key order."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+# Module name -> its JSON string literal; names are interned, so lookups hit on identity
+_module_json = {}
+
+
+def _module_literal(name):
+    literal = _module_json.get(name)
+    if literal is None:
+        name = sys.intern(name)
+        literal = _module_json[name] = encode_basestring(name)
+    return literal
+
+
+class License:
+    """One developer license payload with its canonical JSON built once and cached.
+
+    ``canonical`` is byte-identical to ``canonical_json(build_license_data(...))``
+    encoded as UTF-8, and ``encode(signature)`` to ``encode_license``.
+    """
+
+    __slots__ = ("customer_id", "start_date", "end_date", "modules", "algorithm", "_canonical")
+
+    def __init__(self, customer_id, start_date, end_date, modules, algorithm=RS256):
+        self.customer_id = customer_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.modules = tuple(sys.intern(m) for m in modules)
+        self.algorithm = algorithm
+        self._canonical = None
+
+    @property
+    def canonical(self):
+        """Compact JSON of the unsigned payload (the bytes that get signed)."""
+        if self._canonical is None:
+            parts = [
+                '{"customerId":', encode_basestring(self.customer_id),
+                ',"startDate":', encode_basestring(self.start_date),
+                ',"endDate":', encode_basestring(self.end_date),
+                ',"modules":[', ",".join(map(_module_literal, self.modules)), "]",
+            ]
+            if self.algorithm != RS256:
+                parts += [',"alg":', encode_basestring(self.algorithm)]
+            parts.append("}")
+            self._canonical = "".join(parts).encode("utf-8")
+        return self._canonical
+
+    def to_dict(self):
+        """The same payload as ``build_license_data``."""
+        return build_license_data(self.customer_id, self.start_date, self.end_date,
+                                  self.modules, self.algorithm)
+
+    def signed(self, signature):
+        """Canonical JSON with ``"signature"`` as the last field (``signature`` is hex)."""
+        return b"".join((self.canonical[:-1], b',"signature":"', signature.encode("ascii"), b'"}'))
+
+    def encode(self, signature):
+        """The base64 license string for ``signature``."""
+        return binascii.b2a_base64(self.signed(signature), newline=False).decode("ascii")
+
+
+def key_algorithm(key):
+    """Signing algorithm name for a private or public key object."""
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return RS256
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return EDDSA
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)) \
+            and isinstance(key.curve, ec.SECP256R1):
+        return ES256
+    raise ValueError(f"Unsupported key type: {type(key).__name__}")
+
+
+def sign_payload(private_key, payload: bytes):
+    """Sign ``payload`` with the scheme that matches the key type."""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec, padding
+
+    algorithm = key_algorithm(private_key)
+    if algorithm == RS256:
+        return private_key.sign(payload, padding.PKCS1v15(), hashes.SHA256())
+    if algorithm == ES256:
+        return private_key.sign(payload, ec.ECDSA(hashes.SHA256()))
+    return private_key.sign(payload)
+
+
+def _payload_bytes(license_data):
+    if isinstance(license_data, License):
+        return license_data.canonical
+    return canonical_json(license_data).encode("utf-8")
+
+
+def generate_signature_with_private_key(license_data, key_path: str, password=None):
+    """Generate a signature using the provided private key (PEM).
+
+    ``license_data`` is a ``License`` or a ``build_license_data`` dict. The
+    parsed key is cached per process (see ``license_keys``), so signing many
+    licenses with the same file only reads and decrypts it once.
+    """
+    try:
+        if key_path.startswith(AGENT_PREFIX):
+            from license_agent import client_for
+
+            with timed("canonical_json"):
+                payload = _payload_bytes(license_data)
+            with timed("agent_sign"):
+                return client_for(key_path).sign(payload)
+
+        # A missing file surfaces as FileNotFoundError from the cache's stat()
+        with timed("key_load"):
+            private_key = load_private_key(key_path, password)
+
+        with timed("canonical_json"):
+            payload = _payload_bytes(license_data)
+
+        # Sign the data
+        with timed("sign"):
+            signature = sign_payload(private_key, payload)
+
+        return signature.hex()
+    except Exception as e:
+        raise Exception(f"SIGN_ERROR: {str(e)}")
+
+
+def resolve_algorithm(key_path, password=None, algorithm=None):
+    """Detect the key's algorithm and check it against an explicitly requested one.
+
+    A key file is parsed (and cached) here on first use, so that load is timed
+    as ``key_load`` rather than as algorithm detection.
+    """
+    try:
+        if key_path.startswith(AGENT_PREFIX):
+            from license_agent import client_for
+            with timed("resolve_algorithm"):
+                detected = client_for(key_path).algorithm
+        else:
+            with timed("key_load"):
+                private_key = load_private_key(key_path, password)
+            detected = key_algorithm(private_key)
+    except Exception as e:
+        raise LicenseError("error_private_key", f"SIGN_ERROR: {str(e)}")
+    if algorithm and algorithm != detected:
+        raise LicenseError("error_private_key",
+                           f"Key is {detected} but {algorithm} was requested")
+    return detected
+
+
+def payload_digest(license_data):
+    """sha256 of the signed payload: the canonical JSON of every field but ``signature``.
+
+    Identifies a license in the ledger and revocation list. It is stable across
+    re-encodings (v1 or v2) and, unlike a digest of the signature bytes, cannot
+    be dodged by re-encoding a malleable (ECDSA) signature.
+    """
+    if isinstance(license_data, License):
+        return hashlib.sha256(license_data.canonical).digest()
+    payload = {k: v for k, v in license_data.items() if k != "signature"}
+    return hashlib.sha256(canonical_json(payload).encode("utf-8")).digest()
+
+
+def validate_license_input(customer_id, key_path, start_date, end_date, modules):
+    """Check the form fields in the same order the GUI reports them."""
+    if not customer_id:
+        raise LicenseError("error_customer", "Customer ID is required")
+    if not key_path:
+        raise LicenseError("error_private_key_missing", "Please choose a private key file (.pem)")
+    if not modules:
+        raise LicenseError("error_modules", "Please select at least one module")
+    try:
+        start = datetime.strptime(start_date, DATE_FORMAT)
+        end = datetime.strptime(end_date, DATE_FORMAT)
+    except ValueError:
+        raise LicenseError("error_format", "Dates must be in YYYY-MM-DD format")
+    if end <= start:
+        raise LicenseError("error_order", "Start date must be before end date")
+
+
+def build_license_data(customer_id, start_date, end_date, modules, algorithm=RS256):
+    """Create license data structure similar to TypeScript version."""
+    license_data = {
+        "customerId": customer_id,
+        "startDate": start_date,
+        "endDate": end_date,
+        "modules": list(modules)
+    }
+    if algorithm != RS256:
+        license_data["alg"] = algorithm
+    return license_data
+
+
+def encode_license(license_data, signature):
+    """Attach the signature and wrap the license as base64."""
+    if isinstance(license_data, License):
+        return license_data.encode(signature)
+    license_with_signature = {
+        **license_data,
+        "signature": signature
+    }
+    license_json = canonical_json(license_with_signature)
+    return base64.b64encode(license_json.encode('utf-8')).decode('utf-8')
+
+
+def prepare_license(customer_id, key_path, start_date, end_date, modules, password=None,
+                    algorithm=None):
+    """Validate the input and return the ``License`` that ``key_path`` will sign.
+
+    ``algorithm`` defaults to whatever the key is; passing one makes a
+    mismatching key an error.
+    """
+    with timed("validate"):
+        validate_license_input(customer_id, key_path, start_date, end_date, modules)
+    algorithm = resolve_algorithm(key_path, password, algorithm)
+    return License(customer_id, start_date, end_date, modules, algorithm)
+
+
+def finish_license(record, signature):
+    """Prefix a hex signature with random hex and return the base64 license string."""
+    with timed("random_prefix"):
+        prefix = generate_random_hex_prefix(PREFIX_LENGTH)
+    with timed("encode"):
+        return record.encode(prefix + signature)
+
+
+def generate_license(customer_id, key_path, start_date, end_date, modules, password=None,
+                     algorithm=None):
+    """Validate the input, sign it and return the base64 license string.
+
+    ``algorithm`` defaults to whatever the key is; passing one makes a
+    mismatching key an error.
+    """
+    record = prepare_license(customer_id, key_path, start_date, end_date, modules, password,
+                             algorithm)
+    try:
+        signature = generate_signature_with_private_key(record, key_path, password)
+    except Exception as e:
+        raise LicenseError("error_private_key", str(e))
+    return finish_license(record, signature)
+
+
+def save_license_file(file_path, content):
+    """Write an encoded license exactly like the GUI's Save button."""
+    with timed("write"), open(file_path, "w", encoding="utf-8") as f:
+        f.write(content)
@@ -0,0 +1,309 @@
+"""Signing key provisioning with a pool of pre-generated key pairs.
+
+``new`` writes a private key (``private_key.pem``, what the makers expect) and
+its public key. RSA prime generation is the slow part, about 0.1 s for 2048
+bits and seconds for 4096, so keys are taken from a pool on disk when one is
+ready. Writing them out is then only a PEM re-serialization. When a ``new``
+leaves fewer than ``--low-water`` keys of that type, it starts a detached
+``fill`` process that tops the pool back up to ``--target`` in the
+background. ``fill`` spreads generation over every core.
+
+The pool is one directory per key type (``rsa-4096``, ``p256``, ``ed25519``).
+Each one holds unencrypted PKCS#8 private keys with mode 0600; the public key
+is derived when a key is handed out. Taking a key is an atomic rename, so
+concurrent ``new`` runs never get the same key. Keep the pool on a private,
+local disk.
+
+Usage:
+    python license_keygen.py new --type rsa --bits 4096 --private-key private_key.pem --public-key public_key.pem
+    python license_keygen.py fill --type rsa --bits 4096 --target 16 --workers 0
+    python license_keygen.py status
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+DEFAULT_POOL = os.environ.get("LICENSE_KEY_POOL", "key-pool")
+KEY_TYPES = ("rsa", "p256", "ed25519")
+DEFAULT_BITS = 2048
+MIN_RSA_BITS = 2048
+DEFAULT_LOW_WATER = 4
+DEFAULT_TARGET = 16
+FILL_LOCK = ".fill.lock"
+CLAIMED_SUFFIX = ".claimed"
+# A fill lock not touched for this long belongs to a fill that died
+STALE_LOCK_SECONDS = 600
+
+
+def key_spec(key_type, bits=DEFAULT_BITS):
+    """Pool directory name for a key type: ``rsa-<bits>``, ``p256`` or ``ed25519``."""
+    if key_type not in KEY_TYPES:
+        raise ValueError(f"Unknown key type: {key_type!r}")
+    if key_type == "rsa" and bits < MIN_RSA_BITS:
+        raise ValueError(f"RSA keys need at least {MIN_RSA_BITS} bits")
+    return f"rsa-{bits}" if key_type == "rsa" else key_type
+
+
+def check_spec(spec):
+    """Return ``spec`` if it is one ``key_spec`` can produce, else raise ValueError."""
+    key_type, _, bits = spec.partition("-")
+    if key_spec(key_type, int(bits) if bits.isdigit() else MIN_RSA_BITS) != spec:
+        raise ValueError(f"Unknown key spec: {spec!r}")
+    return spec
+
+
+def generate_private_pem(spec):
+    """Generate one private key for ``spec`` as unencrypted PKCS#8 PEM bytes."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if spec.startswith("rsa-"):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=int(spec[4:]))
+    elif spec == "p256":
+        key = ec.generate_private_key(ec.SECP256R1())
+    elif spec == "ed25519":
+        key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f"Unknown key spec: {spec!r}")
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                             serialization.NoEncryption())
+
+
+def key_pair_pems(private_pem, password=None):
+    """``(private PEM, public PEM)`` for a pool key, encrypting the private one if asked."""
+    from cryptography.hazmat.primitives import serialization
+
+    # The pool only holds keys generate_private_pem made, so the RSA consistency
+    # check (about 0.5 s for 4096 bits, longer than handing the key out) is skipped
+    key = serialization.load_pem_private_key(private_pem, password=None,
+                                             unsafe_skip_rsa_key_validation=True)
+    if password:
+        if isinstance(password, str):
+            password = password.encode("utf-8")
+        private_pem = key.private_bytes(serialization.Encoding.PEM,
+                                        serialization.PrivateFormat.PKCS8,
+                                        serialization.BestAvailableEncryption(password))
+    public_pem = key.public_key().public_bytes(serialization.Encoding.PEM,
+                                               serialization.PublicFormat.SubjectPublicKeyInfo)
+    return private_pem, public_pem
+
+
+def write_private(path, data, mode=0o600):
+    """Write ``data`` next to ``path`` with ``mode`` from the start, then rename it into place."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _generate_into(directory_and_spec):
+    # Pool worker: one key per task, renamed into the pool as soon as it exists
+    directory, spec = directory_and_spec
+    path = os.path.join(directory, os.urandom(8).hex() + ".pem")
+    write_private(path, generate_private_pem(spec))
+    return path
+
+
+class KeyPool:
+    """Directory of ready private keys, one subdirectory per key spec."""
+
+    def __init__(self, path=DEFAULT_POOL):
+        self.path = path
+
+    def directory(self, spec):
+        directory = os.path.join(self.path, spec)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        return directory
+
+    def _ready(self, spec):
+        directory = self.directory(spec)
+        return directory, sorted(name for name in os.listdir(directory) if name.endswith(".pem"))
+
+    def available(self, spec):
+        return len(self._ready(spec)[1])
+
+    def status(self):
+        """``{spec: ready keys}`` for every spec in the pool."""
+        if not os.path.isdir(self.path):
+            return {}
+        return {spec: self.available(spec) for spec in sorted(os.listdir(self.path))
+                if os.path.isdir(os.path.join(self.path, spec))}
+
+    def take(self, spec):
+        """Remove one ready key from the pool and return its PEM bytes, or None if empty."""
+        directory, names = self._ready(spec)
+        for name in names:
+            path = os.path.join(directory, name)
+            # Not a ".pem" name, so _ready() never lists a claimed key again
+            claimed = f"{path}.{os.getpid()}{CLAIMED_SUFFIX}"
+            try:
+                # Whoever renames first owns the key; the others move on to the next one
+                os.rename(path, claimed)
+                with open(claimed, "rb") as f:
+                    pem = f.read()
+            except FileNotFoundError:
+                continue
+            os.unlink(claimed)
+            return pem
+        return None
+
+    def fill(self, spec, target=DEFAULT_TARGET, workers=1):
+        """Generate keys until ``target`` are ready. Returns how many were added.
+
+        Only one fill per spec runs at a time; a second one returns 0 at once.
+        """
+        directory = self.directory(spec)
+        lock_path = os.path.join(directory, FILL_LOCK)
+        if not _acquire_lock(lock_path):
+            return 0
+        try:
+            missing = max(0, target - self.available(spec))
+            if workers > 1 and missing > 1:
+                with multiprocessing.Pool(min(workers, missing)) as pool:
+                    for _ in pool.imap_unordered(_generate_into, [(directory, spec)] * missing):
+                        os.utime(lock_path)
+            else:
+                for _ in range(missing):
+                    _generate_into((directory, spec))
+                    os.utime(lock_path)
+            return missing
+        finally:
+            os.unlink(lock_path)
+
+    def refill_in_background(self, spec, target=DEFAULT_TARGET, workers=0):
+        """Start a detached ``fill`` that outlives this process. Returns the Popen, or None."""
+        if getattr(sys, "frozen", False):
+            # A frozen GUI build cannot re-run this module as a script
+            return None
+        command = [sys.executable, os.path.abspath(__file__), "fill", "--spec", spec,
+                   "--target", str(target), "--workers", str(workers), "--pool", self.path]
+        options = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL,
+                   "stderr": subprocess.DEVNULL}
+        if os.name == "nt":
+            options["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            options["start_new_session"] = True
+        return subprocess.Popen(command, **options)
+
+
+def _acquire_lock(lock_path):
+    try:
+        fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        try:
+            if time.time() - os.stat(lock_path).st_mtime < STALE_LOCK_SECONDS:
+                return False
+            os.unlink(lock_path)
+        except FileNotFoundError:
+            pass
+        try:
+            fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            return False
+    os.write(fd, str(os.getpid()).encode("ascii"))
+    os.close(fd)
+    return True
+
+
+def provision(spec, private_path, public_path, password=None, pool=None,
+              low_water=DEFAULT_LOW_WATER, target=DEFAULT_TARGET, refill=True):
+    """Write a new key pair for ``spec``. Returns True if it came from the pool.
+
+    Without a ready pool key (or without a pool) the key is generated inline.
+    """
+    private_pem = pool.take(spec) if pool is not None else None
+    pooled = private_pem is not None
+    if not pooled:
+        private_pem = generate_private_pem(spec)
+    private_pem, public_pem = key_pair_pems(private_pem, password)
+    write_private(private_path, private_pem)
+    write_private(public_path, public_pem, 0o644)
+    if pool is not None and refill and pool.available(spec) < low_water:
+        pool.refill_in_background(spec, target)
+    return pooled
+
+
+def _add_spec_arguments(parser):
+    parser.add_argument("--type", choices=KEY_TYPES, default="rsa", help="Key type (default: %(default)s)")
+    parser.add_argument("--bits", type=int, default=DEFAULT_BITS,
+                        help="RSA key size (default: %(default)s)")
+    # Used by the background refill, which already knows the spec
+    parser.add_argument("--spec", help=argparse.SUPPRESS)
+    parser.add_argument("--pool", default=DEFAULT_POOL,
+                        help="Pool directory (default: $LICENSE_KEY_POOL or %(default)s)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Provision signing key pairs from a pre-generated pool.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    new = sub.add_parser("new", help="Write a new key pair, from the pool when one is ready")
+    _add_spec_arguments(new)
+    new.add_argument("--private-key", default="private_key.pem")
+    new.add_argument("--public-key", default="public_key.pem")
+    new.add_argument("--password-env", metavar="VAR",
+                     help="Encrypt the private key with the password in this environment variable")
+    new.add_argument("--force", action="store_true", help="Overwrite existing key files")
+    new.add_argument("--no-pool", action="store_true", help="Always generate the key now")
+    new.add_argument("--low-water", type=int, default=DEFAULT_LOW_WATER,
+                     help="Refill the pool in the background below this many keys (default: %(default)s)")
+    new.add_argument("--target", type=int, default=DEFAULT_TARGET,
+                     help="Keys a refill tops the pool up to (default: %(default)s)")
+    new.add_argument("--no-refill", action="store_true", help="Do not start a background refill")
+    fill = sub.add_parser("fill", help="Generate keys until the pool holds --target of them")
+    _add_spec_arguments(fill)
+    fill.add_argument("--target", type=int, default=DEFAULT_TARGET)
+    fill.add_argument("--workers", type=int, default=0,
+                      help="Generating processes; 0 uses every CPU (default: %(default)s)")
+    status = sub.add_parser("status", help="Show the ready keys per type")
+    status.add_argument("--pool", default=DEFAULT_POOL)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    pool = KeyPool(args.pool)
+    if args.command == "status":
+        ready = pool.status()
+        for spec, count in ready.items():
+            print(f"{spec}: {count}")
+        if not ready:
+            print(f"[INFO] {args.pool} holds no keys")
+        return 0
+
+    try:
+        spec = check_spec(args.spec) if args.spec else key_spec(args.type, args.bits)
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+    if args.command == "fill":
+        started = time.perf_counter()
+        added = pool.fill(spec, args.target, args.workers or os.cpu_count() or 1)
+        print(f"[INFO] Added {added} {spec} key(s) in {time.perf_counter() - started:.1f}s; "
+              f"{pool.available(spec)} ready in {args.pool}")
+        return 0
+
+    if not args.force:
+        for path in (args.private_key, args.public_key):
+            if os.path.exists(path):
+                print(f"[ERROR] {path} already exists (use --force to overwrite)", file=sys.stderr)
+                return 1
+    password = os.environ.get(args.password_env) if args.password_env else None
+    if args.password_env and not password:
+        print(f"[ERROR] {args.password_env} is not set", file=sys.stderr)
+        return 2
+    started = time.perf_counter()
+    pooled = provision(spec, args.private_key, args.public_key, password,
+                       None if args.no_pool else pool, args.low_water, args.target,
+                       not args.no_refill)
+    source = "from the pool" if pooled else "generated"
+    print(f"[INFO] {spec} key pair {source} in {time.perf_counter() - started:.2f}s -> "
+          f"{args.private_key}, {args.public_key}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""In-process cache for PEM keys.
+
+Parsing a PEM key (and decrypting it when it is password protected) costs far
+more than the RSA signature itself, so keys are kept in a small LRU keyed by
+absolute path. Each lookup only ``stat``s the file; a changed mtime or size
+means the file was edited and the key is loaded again. Entries also remember a
+salted hash of the password they were loaded with, so a lookup with a
+different (or missing) password goes back to the file and fails like an
+uncached load would.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_KEYS = 8
+
+
+class KeyCache:
+    """LRU of loaded keys with hit/miss counters.
+
+    ``loader(path, password)`` parses a key file; private keys by default.
+    """
+
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS, loader=None):
+        self.max_keys = max_keys
+        self.loader = loader or load_private_key_file
+        self.hits = 0
+        self.misses = 0
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self._salt = os.urandom(16)
+
+    def _password_hash(self, password):
+        if password is None:
+            return None
+        if isinstance(password, str):
+            password = password.encode("utf-8")
+        return hashlib.sha256(self._salt + password).digest()
+
+    def load(self, key_path: str, password=None):
+        """Return the key at ``key_path``, parsing it only when needed."""
+        path = os.path.abspath(key_path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size, self._password_hash(password))
+        with self._lock:
+            entry = self._keys.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._keys.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        key = self.loader(path, password)
+
+        with self._lock:
+            self._keys[path] = (stamp, key)
+            self._keys.move_to_end(path)
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        return key
+
+    def evict(self, key_path: str):
+        with self._lock:
+            self._keys.pop(os.path.abspath(key_path), None)
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"keys": len(self._keys), "hits": self.hits, "misses": self.misses}
+
+
+def load_private_key_file(key_path: str, password=None):
+    """Read and parse a PEM private key, decrypting it with ``password`` if given.
+
+    A password is ignored for unencrypted keys, so one batch can mix both kinds.
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.backends import default_backend
+
+    if isinstance(password, str):
+        password = password.encode("utf-8")
+    with open(key_path, "rb") as key_file:
+        pem = key_file.read()
+    try:
+        return serialization.load_pem_private_key(pem, password=password or None,
+                                                  backend=default_backend())
+    except TypeError:
+        if not password:
+            raise
+        return serialization.load_pem_private_key(pem, password=None, backend=default_backend())
+
+
+def load_public_key_file(key_path: str, password=None):
+    """Read and parse a PEM public key (``password`` is unused)."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.backends import default_backend
+
+    with open(key_path, "rb") as key_file:
+        return serialization.load_pem_public_key(key_file.read(), backend=default_backend())
+
+
+# Process-wide caches used by the signing and verifying code
+default_cache = KeyCache()
+public_cache = KeyCache(loader=load_public_key_file)
+
+
+def load_private_key(key_path: str, password=None):
+    """Load a private key through the process-wide cache."""
+    return default_cache.load(key_path, password)
+
+
+def load_public_key(key_path: str):
+    """Load a public key through the process-wide cache."""
+    return public_cache.load(key_path)
+
+
+def key_fingerprint(key):
+    """sha256 (hex) of the DER SubjectPublicKeyInfo of a private or public key."""
+    from cryptography.hazmat.primitives import serialization
+
+    public_key = key.public_key() if hasattr(key, "public_key") else key
+    der = public_key.public_bytes(serialization.Encoding.DER,
+                                  serialization.PublicFormat.SubjectPublicKeyInfo)
+    return hashlib.sha256(der).hexdigest()
@@ -0,0 +1,315 @@
+"""Append-only issuance ledger with memory-mapped sorted indexes.
+
+Every issued license becomes one fixed-width record in ``<ledger>``:
+
+    customerId   64s  UTF-8, NUL padded (empty for company licenses)
+    kind         B    0 = developer, 1 = company
+    startDate    I    days since 1970-01-01
+    endDate      I    days since 1970-01-01
+    issuedAt     Q    unix seconds
+    modules      32s  bitmask over AVAILABLE_MODULES (up to 256 modules)
+    digest       32s  payload digest (``license_core.payload_digest``)
+    path         255s output path, UTF-8, NUL padded
+
+Three sorted index files sit next to it (``.cust``, ``.exp``, ``.sig``). Each
+covers the first N records. Lookups binary-search the memory-mapped index and
+then scan only the unindexed tail appended since the last ``reindex()``. So a
+query is O(log n + tail) and never loads the whole ledger; ``append`` keeps
+the tail under ``AUTO_REINDEX`` records.
+
+Usage:
+    python license_ledger.py --ledger issuance.ledger query --customer TARENJ
+    python license_ledger.py --ledger issuance.ledger query --expiring 2025-01-01 2025-03-31
+    python license_ledger.py --ledger issuance.ledger query --digest <hex>
+    python license_ledger.py --ledger issuance.ledger reindex
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from license_core import AVAILABLE_MODULES, payload_digest
+from license_verify import decode_license
+
+DEFAULT_LEDGER = os.environ.get("LICENSE_LEDGER", "issuance.ledger")
+
+DEVELOPER_KIND = 0
+COMPANY_KIND = 1
+KIND_NAMES = {DEVELOPER_KIND: "developer", COMPANY_KIND: "company"}
+
+RECORD = struct.Struct(">64sBIIQ32s32s255s")
+CUSTOMER_BYTES = 64
+PATH_BYTES = 255
+MASK_BYTES = 32
+EPOCH = date(1970, 1, 1)
+
+INDEX_HEADER = struct.Struct(">4sQ")
+INDEX_MAGIC = b"GLIX"
+# index file suffix -> (key, record number) entry layout
+INDEXES = {
+    ".cust": struct.Struct(">64sQ"),
+    ".exp": struct.Struct(">IQ"),
+    ".sig": struct.Struct(">32sQ"),
+}
+
+# Unindexed records that make append() rebuild the indexes
+AUTO_REINDEX = 256
+
+MODULE_BITS = {name: i for i, name in enumerate(AVAILABLE_MODULES)}
+
+
+def _days(value):
+    year, month, day = map(int, value.split("-"))
+    return (date(year, month, day) - EPOCH).days
+
+
+def _date(days):
+    return (EPOCH + timedelta(days=days)).isoformat()
+
+
+def _pad(text, size):
+    raw = text.encode("utf-8")
+    if len(raw) > size:
+        raise ValueError(f"{text!r} is longer than {size} bytes")
+    return raw
+
+
+def _mask(modules):
+    mask = 0
+    for name in modules or ():
+        bit = MODULE_BITS.get(name)
+        if bit is None:
+            raise ValueError(f"Unknown module {name!r} cannot be recorded in the ledger")
+        mask |= 1 << bit
+    return mask.to_bytes(MASK_BYTES, "big")
+
+
+def _modules(mask_bytes):
+    mask = int.from_bytes(mask_bytes, "big")
+    return [name for name, bit in MODULE_BITS.items() if mask >> bit & 1]
+
+
+def _customer_key(customer_id):
+    return _pad(customer_id, CUSTOMER_BYTES).ljust(CUSTOMER_BYTES, b"\0")
+
+
+def check_entry(customer_id, modules, output_path):
+    """Raise ValueError if a license with these fields cannot be recorded.
+
+    Lets callers reject a row before they sign and write its license.
+    """
+    _pad(customer_id, CUSTOMER_BYTES)
+    _mask(modules)
+    _pad(os.path.abspath(output_path), PATH_BYTES)
+
+
+def license_digest(license_data):
+    """Digest recorded for a decoded license (developer or company)."""
+    if "customerId" in license_data or "modules" in license_data:
+        return payload_digest(license_data)
+    return hashlib.sha256(license_data["signature"].encode("utf-8")).digest()
+
+
+def unpack_record(raw, record_no=None):
+    cid, kind, start, end, issued, mask, digest, path = RECORD.unpack(raw)
+    return {
+        "record": record_no,
+        "kind": KIND_NAMES.get(kind, str(kind)),
+        "customerId": cid.rstrip(b"\0").decode("utf-8"),
+        "startDate": _date(start),
+        "endDate": _date(end),
+        "modules": _modules(mask),
+        "issuedAt": datetime.fromtimestamp(issued, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "digest": digest.hex(),
+        "path": path.rstrip(b"\0").decode("utf-8"),
+    }
+
+
+class Ledger:
+    """An append-only ledger file plus its sorted indexes.
+
+    ``append`` rebuilds the indexes once ``AUTO_REINDEX`` records are unindexed,
+    so single saves (GUI, CLI) keep lookups logarithmic. Bulk writers pass
+    ``auto_reindex=False`` and call ``reindex()`` once when they finish.
+    """
+
+    def __init__(self, path=DEFAULT_LEDGER, auto_reindex=True):
+        self.path = path
+        self.auto_reindex = auto_reindex
+
+    # ---------- writing ----------
+    def append(self, license_data, output_path, issued_at=None):
+        """Append one issued license (a decoded license dict) and return its record number."""
+        kind = DEVELOPER_KIND if "customerId" in license_data else COMPANY_KIND
+        raw = RECORD.pack(
+            _pad(license_data.get("customerId", ""), CUSTOMER_BYTES), kind,
+            _days(license_data["startDate"]), _days(license_data["endDate"]),
+            int(issued_at if issued_at is not None else time.time()),
+            _mask(license_data.get("modules")), license_digest(license_data),
+            _pad(os.path.abspath(output_path), PATH_BYTES),
+        )
+        # O_APPEND keeps concurrent writers from interleaving inside a record
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            offset = os.lseek(fd, 0, os.SEEK_END)
+            os.write(fd, raw)
+        finally:
+            os.close(fd)
+        if self.auto_reindex and self.unindexed() >= AUTO_REINDEX:
+            self.reindex()
+        return offset // RECORD.size
+
+    def record_license(self, content, output_path, issued_at=None):
+        """Decode an encoded license (v1 or v2) and append it."""
+        return self.append(decode_license(content), output_path, issued_at)
+
+    # ---------- reading ----------
+    def __len__(self):
+        try:
+            return os.path.getsize(self.path) // RECORD.size
+        except FileNotFoundError:
+            return 0
+
+    def _open_map(self, path):
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+    def record(self, record_no, data=None):
+        data = data if data is not None else self._open_map(self.path)
+        start = record_no * RECORD.size
+        return unpack_record(data[start:start + RECORD.size], record_no)
+
+    def _lookup(self, suffix, low, high, matches):
+        """Records whose key is in ``[low, high]``: index range plus a scan of the tail."""
+        data = self._open_map(self.path)
+        if data is None:
+            return []
+        entry = INDEXES[suffix]
+        index = self._open_map(self.path + suffix)
+        indexed = 0
+        record_nos = []
+        if index is not None:
+            magic, indexed = INDEX_HEADER.unpack_from(index, 0)
+            if magic != INDEX_MAGIC:
+                raise ValueError(f"{self.path + suffix} is not a ledger index")
+
+            def key_at(i):
+                return entry.unpack_from(index, INDEX_HEADER.size + i * entry.size)
+
+            lo, hi = 0, indexed
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if key_at(mid)[0] < low:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            while lo < indexed:
+                key, record_no = key_at(lo)
+                if key > high:
+                    break
+                record_nos.append(record_no)
+                lo += 1
+            index.close()
+        total = len(data) // RECORD.size
+        for record_no in range(indexed, total):
+            start = record_no * RECORD.size
+            if matches(RECORD.unpack_from(data, start)):
+                record_nos.append(record_no)
+        records = [self.record(n, data) for n in sorted(record_nos)]
+        data.close()
+        return records
+
+    def find_by_customer(self, customer_id):
+        key = _customer_key(customer_id)
+        return self._lookup(".cust", key, key,
+                            lambda r: r[0].ljust(64, b"\0") == key)
+
+    def find_by_expiry(self, first_date, last_date):
+        low, high = _days(first_date), _days(last_date)
+        return self._lookup(".exp", low, high, lambda r: low <= r[3] <= high)
+
+    def find_by_digest(self, digest):
+        if isinstance(digest, str):
+            digest = bytes.fromhex(digest)
+        return self._lookup(".sig", digest, digest, lambda r: r[6] == digest)
+
+    def unindexed(self):
+        """Number of records appended since the last ``reindex()``."""
+        index = self._open_map(self.path + ".cust")
+        if index is None:
+            return len(self)
+        indexed = INDEX_HEADER.unpack_from(index, 0)[1]
+        index.close()
+        return len(self) - indexed
+
+    # ---------- indexing ----------
+    def reindex(self):
+        """Rebuild the three sorted indexes over every record."""
+        data = self._open_map(self.path)
+        keys = {suffix: [] for suffix in INDEXES}
+        total = 0
+        if data is not None:
+            total = len(data) // RECORD.size
+            for record_no in range(total):
+                cid, _, _, end, _, _, digest, _ = RECORD.unpack_from(data, record_no * RECORD.size)
+                keys[".cust"].append((cid.ljust(64, b"\0"), record_no))
+                keys[".exp"].append((end, record_no))
+                keys[".sig"].append((digest, record_no))
+            data.close()
+        for suffix, entries in keys.items():
+            entries.sort()
+            entry = INDEXES[suffix]
+            tmp_path = self.path + suffix + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, total))
+                f.write(b"".join(entry.pack(*e) for e in entries))
+            os.replace(tmp_path, self.path + suffix)
+        return total
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Query the license issuance ledger.")
+    parser.add_argument("--ledger", default=DEFAULT_LEDGER)
+    sub = parser.add_subparsers(dest="command", required=True)
+    query = sub.add_parser("query", help="Look up issued licenses")
+    group = query.add_mutually_exclusive_group(required=True)
+    group.add_argument("--customer")
+    group.add_argument("--expiring", nargs=2, metavar=("FROM", "TO"),
+                       help="endDate between these dates (inclusive)")
+    group.add_argument("--digest",
+                       help="Payload digest (hex): sha256 of the canonical signed JSON "
+                            "without the signature (license_core.payload_digest)")
+    sub.add_parser("reindex", help="Rebuild the sorted indexes")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    ledger = Ledger(args.ledger)
+    if args.command == "reindex":
+        print(f"[INFO] Indexed {ledger.reindex()} record(s)")
+        return 0
+    if args.customer:
+        records = ledger.find_by_customer(args.customer)
+    elif args.expiring:
+        records = ledger.find_by_expiry(*args.expiring)
+    else:
+        records = ledger.find_by_digest(args.digest)
+    for record in records:
+        print(json.dumps(record, ensure_ascii=False))
+    print(f"[INFO] {len(records)} record(s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
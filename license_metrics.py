@@ -0,0 +1,228 @@
+"""Per-stage timing for the signing pipeline, plus an opt-in profiler.
+
+``license_core`` and ``license_batch`` time their stages (key load, canonical
+JSON, sign, base64 encode, file write, ...) with ``timed(name)``. That costs
+two ``perf_counter`` calls and a histogram update, well under a microsecond
+next to a millisecond RSA signature. At the end of a run the numbers can be
+written as a Prometheus text file (``<prefix>.prom``, for the node exporter's
+textfile collector) and a JSON summary (``<prefix>.json``).
+
+``Profiler`` is only created when asked for (``--profile``). It runs cProfile
+and also samples the main thread's stack on a CPU timer. The first gives
+``<prefix>.pstats`` for ``pstats``/snakeviz; the second gives
+``<prefix>.folded`` collapsed stacks for ``flamegraph.pl`` or speedscope.
+
+Usage:
+    python license_batch.py customers.csv --key private_key.pem --metrics run
+    python license_batch.py customers.csv --key private_key.pem --profile run
+"""
+import bisect
+import json
+import os
+import time
+from collections import Counter
+
+# Histogram bucket upper bounds in seconds (10 us .. 5 s)
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+           0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SAMPLE_INTERVAL = 0.001
+
+
+class Histogram:
+    """Count, sum and bucket counts (non-cumulative) of observed durations."""
+
+    __slots__ = ("count", "total", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def merge(self, count, total, buckets):
+        self.count += count
+        self.total += total
+        for i, n in enumerate(buckets):
+            self.buckets[i] += n
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile (``inf`` past the last)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+        return float("inf")
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class Metrics:
+    """Stage histograms and event counters for one process."""
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = Counter()
+
+    def histogram(self, stage):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        return histogram
+
+    def timed(self, stage):
+        """``with metrics.timed("sign"): ...`` records how long the block took."""
+        return _Timer(self.histogram(stage))
+
+    def incr(self, event, n=1):
+        self.counters[event] += n
+
+    # ---------- aggregation ----------
+    def snapshot(self):
+        """Plain, picklable copy of everything recorded so far."""
+        return {
+            "stages": {name: (h.count, h.total, list(h.buckets)) for name, h in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def drain(self):
+        """Snapshot and reset; worker processes ship these deltas to the parent."""
+        snapshot = self.snapshot()
+        self.stages = {}
+        self.counters = Counter()
+        return snapshot
+
+    def merge(self, snapshot):
+        for name, (count, total, buckets) in snapshot["stages"].items():
+            self.histogram(name).merge(count, total, buckets)
+        self.counters.update(snapshot["counters"])
+
+    def reset(self):
+        self.stages = {}
+        self.counters = Counter()
+
+    # ---------- export ----------
+    def summary(self):
+        total = sum(h.total for h in self.stages.values()) or 1.0
+        stages = {}
+        for name, h in sorted(self.stages.items(), key=lambda item: -item[1].total):
+            stages[name] = {
+                "count": h.count,
+                "total_s": round(h.total, 6),
+                "mean_us": round(h.total / h.count * 1e6, 2) if h.count else 0.0,
+                "p50_le_us": h.quantile(0.50) * 1e6,
+                "p95_le_us": h.quantile(0.95) * 1e6,
+                "p99_le_us": h.quantile(0.99) * 1e6,
+                "share": round(h.total / total, 4),
+            }
+        return {"stages": stages, "counters": dict(self.counters)}
+
+    def to_prometheus(self, prefix="license"):
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent in each license pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for name, h in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (None,), h.buckets):
+                cumulative += n
+                le = "+Inf" if bound is None else repr(bound)
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {h.total!r}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {h.count}')
+        if self.counters:
+            lines.append(f"# HELP {prefix}_events_total License pipeline events.")
+            lines.append(f"# TYPE {prefix}_events_total counter")
+            for event, n in sorted(self.counters.items()):
+                lines.append(f'{prefix}_events_total{{event="{event}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, prefix):
+        """Write ``<prefix>.prom`` and ``<prefix>.json``; returns their paths."""
+        paths = (prefix + ".prom", prefix + ".json")
+        _write_atomic(paths[0], self.to_prometheus())
+        _write_atomic(paths[1], json.dumps(self.summary(), indent=2) + "\n")
+        return paths
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Process-wide metrics used by license_core and license_batch
+metrics = Metrics()
+timed = metrics.timed
+
+
+# ---------- PROFILING ----------
+class Profiler:
+    """cProfile plus a SIGPROF stack sampler for collapsed (flame graph) stacks.
+
+    Both only see the process they run in; profile with ``--workers 1`` to see
+    the signing itself. The sampler needs ``signal.setitimer`` (not on Windows)
+    and is skipped without it.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        # Imported here so the headless tools do not load them on every start
+        import cProfile
+        import signal
+
+        self._signal = signal
+        self.interval = interval
+        self.profile = cProfile.Profile()
+        self.stacks = Counter()
+        self._sampling = hasattr(signal, "setitimer")
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        if self._sampling:
+            signal = self._signal
+            self._previous = signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        if self._sampling:
+            signal = self._signal
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous)
+
+    def write(self, prefix):
+        """Write ``<prefix>.pstats`` and, if sampled, ``<prefix>.folded``; returns the paths."""
+        paths = [prefix + ".pstats"]
+        self.profile.dump_stats(paths[0])
+        if self._sampling:
+            paths.append(prefix + ".folded")
+            _write_atomic(paths[1], "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common()))
+        return paths
@@ -0,0 +1,57 @@
+"""Named module presets for the developer license makers.
+
+Presets live in a small JSON file (``{"name": ["module", ...]}``) next to the
+app, or wherever ``LICENSE_PRESETS`` points. The built-in ``All`` preset
+grants every module, like the old hardcoded default selection did. Modules
+that left the catalogue (or are not names at all) are dropped when a preset is
+loaded, and the rest come back in catalogue order. Entries that are not lists
+are skipped.
+"""
+import json
+import os
+
+from license_core import AVAILABLE_MODULES
+
+DEFAULT_PRESETS_FILE = os.environ.get("LICENSE_PRESETS", "module_presets.json")
+ALL_PRESET = "All"
+
+
+def load_presets(path=DEFAULT_PRESETS_FILE):
+    """Built-in presets plus the ones saved in ``path``, if it exists."""
+    presets = {ALL_PRESET: list(AVAILABLE_MODULES)}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        # A missing or corrupt file just means no saved presets
+        return presets
+    if not isinstance(saved, dict):
+        return presets
+    catalogue = set(AVAILABLE_MODULES)
+    for name, modules in saved.items():
+        if not isinstance(modules, list):
+            # Hand-edited garbage; a string would otherwise split into letters
+            continue
+        wanted = {m for m in modules if isinstance(m, str)} & catalogue
+        presets[name] = [m for m in AVAILABLE_MODULES if m in wanted]
+    return presets
+
+
+def save_preset(name, modules, path=DEFAULT_PRESETS_FILE):
+    """Add or replace one preset in ``path`` and return the updated presets."""
+    if not name or name == ALL_PRESET:
+        raise ValueError(f"Invalid preset name: {name!r}")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        saved = {}
+    if not isinstance(saved, dict):
+        saved = {}
+    chosen = set(modules)
+    saved[name] = [m for m in AVAILABLE_MODULES if m in chosen]
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(saved, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return load_presets(path)
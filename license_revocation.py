@@ -0,0 +1,261 @@
+"""Signed revocation list that verifiers can memory-map.
+
+A revoked license is identified by its payload digest
+(``license_core.payload_digest``). The artifact has four parts, laid out
+back to back:
+
+    header   magic "GLRV", version, signing alg, k, bloom bits, entry count, sig length
+    bloom    Bloom filter over the digests (~1% false positives)
+    table    the digests, sorted, 32 bytes each
+    sig      signature over everything before it, made with the license key
+
+``RevocationList`` checks the signature once per file version (path + mtime).
+After that a lookup touches a few bloom bytes, which answers most "not
+revoked" checks in constant time. For bloom hits it runs an interpolation
+search over the uniformly distributed sorted digests, which takes an expected
+handful of probes even with hundreds of thousands of entries. The file is
+never read in full on a check.
+
+Usage:
+    python license_revocation.py build --key private_key.pem --output revocations.bin \\
+        --license stolen.lic --digest <hex> --base revocations.bin
+    python license_revocation.py check --list revocations.bin --public-key public_key.pem license.lic
+"""
+import argparse
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from cryptography.exceptions import InvalidSignature
+
+from license_core import ALGORITHMS, EDDSA, ES256, RS256, key_algorithm, sign_payload
+from license_keys import load_private_key, load_public_key
+from license_ledger import Ledger, license_digest
+from license_verify import decode_license, verify_payload
+
+MAGIC = b"GLRV"
+# Version 2: the table holds payload digests (version 1 held signature digests)
+VERSION = 2
+HEADER = struct.Struct(">4sBBBQQH")
+DIGEST_SIZE = 32
+FALSE_POSITIVE_RATE = 0.01
+MIN_BLOOM_BITS = 64
+
+
+def bloom_parameters(count, rate=FALSE_POSITIVE_RATE):
+    """``(bits, hashes)`` for ``count`` entries at the given false positive rate."""
+    n = max(count, 1)
+    bits = max(MIN_BLOOM_BITS, int(math.ceil(-n * math.log(rate) / (math.log(2) ** 2))))
+    bits = (bits + 7) // 8 * 8
+    return bits, max(1, round(bits / n * math.log(2)))
+
+
+def bloom_positions(digest, bits, hashes):
+    """Double hashing straight from the (already uniform) sha256 digest."""
+    h1 = int.from_bytes(digest[0:8], "big")
+    h2 = int.from_bytes(digest[8:16], "big") | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+def build_revocation_list(digests, key_path, password=None):
+    """Return the signed artifact bytes for an iterable of 32-byte digests."""
+    table = sorted(set(digests))
+    for digest in table:
+        if len(digest) != DIGEST_SIZE:
+            raise ValueError("Digests must be 32 bytes")
+    bits, hashes = bloom_parameters(len(table))
+    bloom = bytearray(bits // 8)
+    for digest in table:
+        for pos in bloom_positions(digest, bits, hashes):
+            bloom[pos >> 3] |= 1 << (pos & 7)
+
+    private_key = load_private_key(key_path, password)
+    algorithm = key_algorithm(private_key)
+    # The signature length is part of the signed header, so it has to be known
+    # up front: RSA/Ed25519 are fixed size, DER ECDSA is zero-padded to its maximum.
+    sig_len = _signature_size(private_key)
+    body = b"".join((
+        HEADER.pack(MAGIC, VERSION, ALGORITHMS.index(algorithm), hashes, bits, len(table), sig_len),
+        bytes(bloom),
+        b"".join(table),
+    ))
+    signature = sign_payload(private_key, body)
+    return body + signature.ljust(sig_len, b"\0")
+
+
+def _signature_size(private_key):
+    algorithm = key_algorithm(private_key)
+    if algorithm == RS256:
+        return private_key.key_size // 8
+    if algorithm == EDDSA:
+        return 64
+    # DER ECDSA P-256 signatures are at most 72 bytes
+    return 72
+
+
+def _strip_der_padding(signature):
+    """DER length tells the real size of a zero-padded ECDSA signature."""
+    if len(signature) > 2 and signature[0] == 0x30:
+        return signature[:signature[1] + 2]
+    return signature
+
+
+class RevocationList:
+    """Memory-mapped view of a revocation artifact, verified once per file version."""
+
+    def __init__(self, path, public_key_path):
+        self.path = path
+        self.public_key_path = public_key_path
+        self._stamp = None
+        self._map = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        st = os.stat(self.path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return
+        with open(self.path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, alg_id, hashes, bits, count, sig_len = HEADER.unpack_from(data, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{self.path} is not a revocation list")
+            bloom_start = HEADER.size
+            table_start = bloom_start + bits // 8
+            sig_start = table_start + count * DIGEST_SIZE
+            if len(data) != sig_start + sig_len:
+                raise ValueError(f"{self.path} is truncated")
+            signature = data[sig_start:]
+            if ALGORITHMS[alg_id] == ES256:
+                signature = _strip_der_padding(signature)
+            verify_payload(load_public_key(self.public_key_path), signature,
+                           data[:sig_start], ALGORITHMS[alg_id])
+        except (InvalidSignature, struct.error, IndexError) as e:
+            data.close()
+            raise ValueError(f"Revocation list signature check failed: {e}")
+        except Exception:
+            data.close()
+            raise
+        if self._map is not None:
+            self._map.close()
+        self._map = data
+        self._stamp = stamp
+        self._hashes, self._bits, self._count = hashes, bits, count
+        self._bloom_start, self._table_start = bloom_start, table_start
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return self._count
+
+    def is_revoked(self, digest):
+        """True if ``digest`` (32 bytes or hex) is on the list."""
+        if isinstance(digest, str):
+            digest = bytes.fromhex(digest)
+        with self._lock:
+            self._load()
+            data = self._map
+            for pos in bloom_positions(digest, self._bits, self._hashes):
+                if not data[self._bloom_start + (pos >> 3)] & (1 << (pos & 7)):
+                    return False
+            return self._search(digest)
+
+    def _search(self, digest):
+        """Interpolation search; digests are uniform so this needs few probes."""
+        data, base = self._map, self._table_start
+        lo, hi = 0, self._count - 1
+        target = int.from_bytes(digest[:8], "big")
+        while lo <= hi:
+            lo_key = int.from_bytes(data[base + lo * DIGEST_SIZE:base + lo * DIGEST_SIZE + 8], "big")
+            hi_key = int.from_bytes(data[base + hi * DIGEST_SIZE:base + hi * DIGEST_SIZE + 8], "big")
+            if target < lo_key or target > hi_key:
+                return False
+            if hi_key == lo_key:
+                mid = lo
+            else:
+                mid = lo + (target - lo_key) * (hi - lo) // (hi_key - lo_key)
+            entry = data[base + mid * DIGEST_SIZE:base + (mid + 1) * DIGEST_SIZE]
+            if entry == digest:
+                return True
+            if entry < digest:
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        return False
+
+    def is_license_revoked(self, content):
+        """Decode an encoded license (v1 or v2) and check its digest."""
+        return self.is_revoked(license_digest(decode_license(content)))
+
+    def digests(self):
+        """Every revoked digest (reads the whole table; for rebuilding only)."""
+        with self._lock:
+            self._load()
+            table = self._map[self._table_start:self._table_start + self._count * DIGEST_SIZE]
+        return [table[i:i + DIGEST_SIZE] for i in range(0, len(table), DIGEST_SIZE)]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Build or query a license revocation list.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Write a signed revocation list")
+    build.add_argument("--key", required=True, help="Private key (PEM) to sign the list")
+    build.add_argument("--key-password-env", metavar="VAR")
+    build.add_argument("--output", required=True)
+    build.add_argument("--base", help="Existing list to extend (checked with --public-key)")
+    build.add_argument("--public-key", help="Public key for --base")
+    build.add_argument("--digest", action="append", default=[],
+                       help="Payload digest (hex): sha256 of the canonical signed JSON "
+                            "without the signature (license_core.payload_digest)")
+    build.add_argument("--license", action="append", default=[], help="License file to revoke")
+    build.add_argument("--ledger", help="Ledger to look up --customer in")
+    build.add_argument("--customer", action="append", default=[],
+                       help="Revoke every license the ledger has for this customer")
+    check = sub.add_parser("check", help="Check licenses against a list")
+    check.add_argument("--list", required=True)
+    check.add_argument("--public-key", required=True)
+    check.add_argument("licenses", nargs="+")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "check":
+        revocations = RevocationList(args.list, args.public_key)
+        revoked = 0
+        for path in args.licenses:
+            with open(path, "rb") as f:
+                is_revoked = revocations.is_license_revoked(f.read())
+            revoked += is_revoked
+            print(f"{path}: {'REVOKED' if is_revoked else 'not revoked'}")
+        return 1 if revoked else 0
+
+    digests = [bytes.fromhex(d) for d in args.digest]
+    for path in args.license:
+        with open(path, "rb") as f:
+            digests.append(license_digest(decode_license(f.read())))
+    if args.customer:
+        ledger = Ledger(args.ledger) if args.ledger else Ledger()
+        for customer_id in args.customer:
+            digests.extend(bytes.fromhex(r["digest"]) for r in ledger.find_by_customer(customer_id))
+    if args.base:
+        if not args.public_key:
+            print("[ERROR] --public-key is required to extend --base", file=sys.stderr)
+            return 2
+        digests.extend(RevocationList(args.base, args.public_key).digests())
+    password = os.environ.get(args.key_password_env) if args.key_password_env else None
+    artifact = build_revocation_list(digests, args.key, password)
+    tmp_path = args.output + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(artifact)
+    os.replace(tmp_path, args.output)
+    print(f"[INFO] {len(set(digests))} revoked digest(s), {len(artifact)} bytes -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
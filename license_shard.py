@@ -0,0 +1,247 @@
+"""Split a batch run across hosts and merge the shards' outputs back together.
+
+Every host gets the same manifest and runs ``license_batch.py --shard K/N``.
+Rows are assigned by a sha256 of the customerId (``license_batch.shard_of``),
+so the hosts need nothing but their local copy of the manifest and key, and
+no customer lands on two hosts. Each shard leaves its ``.lic`` files and a
+``shard-K-of-N.report.jsonl`` in its output directory.
+
+``merge`` takes those directories (copied back from the hosts) and checks them
+against the manifest before copying anything:
+
+* every shard 1..N is present exactly once and ran over this manifest
+* every shard signed with the same key (by public key fingerprint)
+* every manifest customer was issued by its own shard, exactly once
+* every listed ``.lic`` file is a plain name in its shard directory, exists
+  and still has the sha256 in its report
+
+Customers issued twice are reported as duplicates and not copied, since
+there is no way to tell which license is the right one. Customers that were
+never issued are reported as missing. Either way the exit code is 1. The
+merged report lists every customer with its shard and final status.
+
+Usage:
+    python license_shard.py plan customers.csv --shards 4
+    python license_batch.py customers.csv --key private_key.pem --out-dir shard1/ --shard 1/4
+    python license_shard.py merge customers.csv shard1/ shard2/ shard3/ shard4/ --out-dir licenses/
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+from collections import Counter, defaultdict
+
+from license_batch import REPORT_VERSION, file_digest, read_manifest, shard_of
+
+REPORT_GLOB = "shard-*-of-*.report.jsonl"
+MERGED_REPORT = "issue-report.jsonl"
+PRESENT = ("issued", "unchanged")
+
+
+def plan(manifest_path, shards):
+    """Rows per shard (index 0 is shard 1), to check the split is balanced."""
+    counts = Counter(shard_of(row["customerId"], shards) for row in read_manifest(manifest_path))
+    return [counts[i] for i in range(shards)]
+
+
+def load_report(path):
+    """``(header, entries)`` of one issuance report."""
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "null")
+        if not isinstance(header, dict) or header.get("report") != REPORT_VERSION:
+            raise ValueError(f"{path} is not an issuance report")
+        return header, [json.loads(line) for line in f if line.strip()]
+
+
+class ShardMerge:
+    """Checks a set of shard reports against the manifest and copies the licenses."""
+
+    def __init__(self, manifest_path, shard_dirs):
+        self.manifest_path = manifest_path
+        self.manifest = file_digest(manifest_path)
+        self.problems = []
+        self.shards = None
+        self.key = None
+        # shard number -> directory holding its report and licenses
+        self.dirs = {}
+        # customerId -> [(shard, entry)] for every present entry
+        self.present = defaultdict(list)
+        self.failed = {}
+        for shard_dir in shard_dirs:
+            reports = sorted(glob.glob(os.path.join(shard_dir, REPORT_GLOB)))
+            if not reports:
+                self.problems.append(f"{shard_dir}: no shard report")
+            for path in reports:
+                self._add_report(path, shard_dir)
+        if self.shards:
+            for k in range(1, self.shards + 1):
+                if k not in self.dirs:
+                    self.problems.append(f"shard {k}/{self.shards} is missing")
+
+    def _add_report(self, path, shard_dir):
+        try:
+            header, entries = load_report(path)
+        except (OSError, ValueError) as e:
+            self.problems.append(f"{path}: {e}")
+            return
+        if header.get("manifest") != self.manifest:
+            self.problems.append(f"{path}: issued from a different manifest")
+            return
+        if not header.get("shard"):
+            self.problems.append(f"{path}: not a sharded run")
+            return
+        k, n = header["shard"]
+        if self.shards is None:
+            self.shards = n
+            self.key = header.get("key")
+        if n != self.shards:
+            self.problems.append(f"{path}: shard {k}/{n} does not match {self.shards} shards")
+            return
+        if header.get("key") != self.key:
+            self.problems.append(f"{path}: signed with key {header.get('key')}, "
+                                 f"not {self.key} like the other shards")
+            return
+        if k in self.dirs:
+            self.problems.append(f"{path}: shard {k}/{n} already read from {self.dirs[k]}")
+            return
+        self.dirs[k] = shard_dir
+        for entry in entries:
+            if entry["status"] in PRESENT:
+                self.present[entry["customerId"]].append((k, entry))
+            else:
+                self.failed[entry["customerId"]] = entry.get("error")
+
+    def check(self):
+        """Yield ``(customerId, shard, status, entry)`` for every customer, manifest first.
+
+        ``status`` is ``ok``, ``duplicate``, ``missing``, ``failed``, ``wrong_shard``,
+        ``unexpected`` or ``corrupt``; ``entry`` is the report line to merge for ``ok``.
+        """
+        seen = set()
+        for row in read_manifest(self.manifest_path):
+            customer_id = row["customerId"]
+            if customer_id in seen:
+                continue
+            seen.add(customer_id)
+            home = shard_of(customer_id, self.shards) + 1 if self.shards else None
+            found = self.present.get(customer_id, [])
+            if len(found) > 1:
+                yield customer_id, [k for k, _ in found], "duplicate", None
+            elif not found:
+                yield customer_id, home, "failed" if customer_id in self.failed else "missing", None
+            else:
+                k, entry = found[0]
+                if k != home:
+                    yield customer_id, k, "wrong_shard", None
+                elif not self._intact(k, entry):
+                    yield customer_id, k, "corrupt", None
+                else:
+                    yield customer_id, k, "ok", entry
+        for customer_id, found in self.present.items():
+            if customer_id not in seen:
+                yield customer_id, [k for k, _ in found], "unexpected", None
+
+    def _intact(self, k, entry):
+        name = entry.get("file")
+        # A report must not point outside its shard directory (or the merge's out_dir)
+        if not isinstance(name, str) or os.path.basename(name) != name or name in ("", ".", ".."):
+            return False
+        try:
+            return file_digest(os.path.join(self.dirs[k], name)) == entry["sha256"]
+        except (OSError, TypeError):
+            return False
+
+    def merge(self, out_dir, report_path, move=False, ledger=None):
+        """Copy (or move) every ``ok`` license into ``out_dir`` and write the merged report.
+
+        Returns a Counter of statuses.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        tmp_path = report_path + ".tmp"
+        statuses = Counter()
+        names = {}
+        with open(tmp_path, "w", encoding="utf-8") as report:
+            report.write(json.dumps({"report": REPORT_VERSION, "manifest": self.manifest,
+                                     "shards": self.shards, "key": self.key},
+                                    separators=(",", ":")) + "\n")
+            for customer_id, shard, status, entry in self.check():
+                file_name = entry["file"] if entry else None
+                if status == "ok" and names.setdefault(file_name, customer_id) != customer_id:
+                    status, file_name = "duplicate", None
+                if status == "ok":
+                    source = os.path.join(self.dirs[shard], file_name)
+                    target = os.path.join(out_dir, file_name)
+                    if move:
+                        os.replace(source, target)
+                    else:
+                        shutil.copy2(source, target)
+                    if ledger is not None:
+                        with open(target, "rb") as f:
+                            ledger.record_license(f.read(), target)
+                statuses[status] += 1
+                report.write(json.dumps({
+                    "customerId": customer_id,
+                    "shard": shard,
+                    "status": status,
+                    "file": file_name if status == "ok" else None,
+                    "sha256": entry["sha256"] if status == "ok" else None,
+                    "error": self.failed.get(customer_id) if status == "failed" else None,
+                }, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, report_path)
+        if ledger is not None:
+            ledger.reindex()
+        return statuses
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Plan and merge sharded batch runs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    plan_parser = sub.add_parser("plan", help="Show how many rows each shard gets")
+    plan_parser.add_argument("manifest")
+    plan_parser.add_argument("--shards", type=int, required=True)
+    merge_parser = sub.add_parser("merge", help="Check and combine shard output directories")
+    merge_parser.add_argument("manifest", help="The manifest every shard was issued from")
+    merge_parser.add_argument("shard_dirs", nargs="+", metavar="SHARD_DIR")
+    merge_parser.add_argument("--out-dir", default="licenses", help="Directory for the merged .lic files")
+    merge_parser.add_argument("--report", help=f"Merged report (default: <out-dir>/{MERGED_REPORT})")
+    merge_parser.add_argument("--move", action="store_true",
+                              help="Move the files instead of copying them (same filesystem only)")
+    merge_parser.add_argument("--ledger", help="Record every merged license in this ledger")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "plan":
+        if args.shards < 1:
+            print("[ERROR] --shards must be at least 1", file=sys.stderr)
+            return 2
+        counts = plan(args.manifest, args.shards)
+        for k, count in enumerate(counts, start=1):
+            print(f"shard {k}/{args.shards}: {count} row(s)")
+        return 0
+
+    merger = ShardMerge(args.manifest, args.shard_dirs)
+    for problem in merger.problems:
+        print(f"[ERROR] {problem}", file=sys.stderr)
+    if merger.shards is None:
+        print("[ERROR] No usable shard reports", file=sys.stderr)
+        return 1
+    ledger = None
+    if args.ledger:
+        from license_ledger import Ledger
+        ledger = Ledger(args.ledger, auto_reindex=False)
+    report_path = args.report or os.path.join(args.out_dir, MERGED_REPORT)
+    statuses = merger.merge(args.out_dir, report_path, args.move, ledger)
+    bad = {status: n for status, n in statuses.items() if status != "ok"}
+    for status, n in sorted(bad.items()):
+        print(f"[ERROR] {n} customer(s) {status.replace('_', ' ')}", file=sys.stderr)
+    print(f"[INFO] Merged {statuses['ok']} license(s) from {len(merger.dirs)}/{merger.shards} "
+          f"shard(s) -> {args.out_dir} (report: {report_path})")
+    return 1 if bad or merger.problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
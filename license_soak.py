@@ -0,0 +1,297 @@
+"""Soak test: a fleet of simulated apps re-checking their licenses.
+
+Every deployed app re-reads ``license.lic`` and ``company-license.lic`` on a
+timer and runs decode + verify on both. This harness plays thousands of those
+apps at once. Each consumer is an asyncio task that wakes on its own schedule
+and hands the check to a process pool, where ``verify_developer_license`` and
+``verify_company_license`` run on the files on disk. Nothing leaves the
+machine.
+
+Each scenario (license format x key type x module count) gets a fresh pool and
+reports throughput, latency percentiles, worker CPU per check and peak RSS.
+Latency is counted from when a check was due, not from when it was sent. A
+saturated pool therefore shows up as growing latency instead of a quietly
+lower rate. ``consumers_per_core`` turns the CPU cost into how many apps one
+core can serve at the production interval of 5 minutes.
+
+By default the verification cache is off in the workers, like an app that
+re-verifies every time. ``--cache`` keeps one per worker to show the warm
+case.
+
+Usage:
+    python license_soak.py --output soak.json
+    python license_soak.py --keys rsa-2048 rsa-4096 --formats v1 v2 --consumers 5000 --duration 30
+    python license_soak.py --license license.lic --company company-license.lic --public-key public_key.pem
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from license_compact import generate_compact_license
+from license_core import AVAILABLE_MODULES, DATE_FORMAT, generate_license, save_license_file
+from license_keygen import check_spec, generate_private_pem, key_pair_pems, write_private
+from license_verify import VerificationCache, verify_company_license, verify_developer_license
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FORMATS = ("v1", "v2")
+DEFAULT_KEYS = ("rsa-2048", "rsa-4096", "p256", "ed25519")
+DEFAULT_MODULE_COUNTS = (1, len(AVAILABLE_MODULES))
+DEFAULT_CONSUMERS = 1000
+DEFAULT_INTERVAL = 1.0
+DEFAULT_DURATION = 5.0
+# How often the real application re-checks, for consumers_per_core
+PRODUCTION_INTERVAL = 300
+
+
+def _max_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+# ---------- SCENARIOS ----------
+def build_scenarios(workdir, keys=DEFAULT_KEYS, formats=FORMATS, module_counts=DEFAULT_MODULE_COUNTS):
+    """Generate one key pair per key spec and one license per scenario with the makers.
+
+    Returns a list of scenario dicts (name, paths and what they cover).
+    """
+    from company_license import generate_company_license
+
+    today = date.today()
+    start_date = (today - timedelta(days=30)).strftime(DATE_FORMAT)
+    end_date = (today + timedelta(days=335)).strftime(DATE_FORMAT)
+    company_path = os.path.join(workdir, "company-license.lic")
+    save_license_file(company_path, generate_company_license(start_date, end_date))
+    scenarios = []
+    for spec in keys:
+        private_pem, public_pem = key_pair_pems(generate_private_pem(check_spec(spec)))
+        private_path = os.path.join(workdir, f"{spec}.pem")
+        public_path = os.path.join(workdir, f"{spec}.pub.pem")
+        write_private(private_path, private_pem)
+        write_private(public_path, public_pem, 0o644)
+        for fmt in formats:
+            for count in module_counts:
+                modules = AVAILABLE_MODULES[:count]
+                name = f"{fmt}-{spec}-m{count}"
+                license_path = os.path.join(workdir, f"{name}.lic")
+                if fmt == "v2":
+                    with open(license_path, "wb") as f:
+                        f.write(generate_compact_license(name, private_path, start_date, end_date,
+                                                         modules))
+                else:
+                    save_license_file(license_path, generate_license(name, private_path, start_date,
+                                                                     end_date, modules))
+                scenarios.append({"name": name, "format": fmt, "key": spec, "modules": count,
+                                  "license": license_path, "company": company_path,
+                                  "public_key": public_path})
+    return scenarios
+
+
+# ---------- WORKERS ----------
+_worker_scenario = None
+_worker_cache = None
+
+
+def _init_worker(scenario, use_cache):
+    global _worker_scenario, _worker_cache
+    _worker_scenario = scenario
+    _worker_cache = VerificationCache() if use_cache else None
+
+
+def _check_in_worker(_=None):
+    """One app's re-check: read both files, decode + verify both. Returns ``(valid, cpu_s, rss_kb)``."""
+    scenario = _worker_scenario
+    started = time.process_time()
+    cache = _worker_cache if _worker_cache is not None else VerificationCache(0)
+    with open(scenario["license"], "rb") as f:
+        developer = verify_developer_license(f.read(), scenario["public_key"], cache=cache)
+    with open(scenario["company"], "rb") as f:
+        company = verify_company_license(f.read(), cache=cache)
+    return developer["valid"] and company["valid"], time.process_time() - started, _max_rss_kb()
+
+
+# ---------- LOAD ----------
+class _Samples:
+    def __init__(self):
+        self.latencies = []
+        self.cpu = 0.0
+        self.invalid = 0
+        self.worker_rss_kb = 0
+        self.last_done = 0.0
+
+    def record(self, latency, valid, cpu, rss_kb, done):
+        self.latencies.append(latency)
+        self.cpu += cpu
+        self.invalid += not valid
+        self.worker_rss_kb = max(self.worker_rss_kb, rss_kb or 0)
+        self.last_done = done
+
+
+async def _consumer(loop, pool, due, interval, deadline, samples):
+    while due < deadline:
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        valid, cpu, rss_kb = await loop.run_in_executor(pool, _check_in_worker)
+        done = loop.time()
+        samples.record(done - due, valid, cpu, rss_kb, done)
+        due += interval
+
+
+async def _soak(pool, workers, consumers, interval, duration, seed):
+    loop = asyncio.get_running_loop()
+    # Warm every worker (imports, public key) before the clock starts
+    await asyncio.gather(*(loop.run_in_executor(pool, _check_in_worker) for _ in range(workers * 2)))
+    rng = random.Random(seed)
+    samples = _Samples()
+    start = loop.time()
+    deadline = start + duration
+    # Apps start at random points of their interval, like a fleet booted over time
+    await asyncio.gather(*(_consumer(loop, pool, start + rng.uniform(0, interval), interval,
+                                     deadline, samples) for _ in range(consumers)))
+    return samples, (samples.last_done or loop.time()) - start
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_scenario(scenario, consumers=DEFAULT_CONSUMERS, interval=DEFAULT_INTERVAL,
+                 duration=DEFAULT_DURATION, workers=None, use_cache=False, seed=0):
+    """Soak one scenario in a fresh process pool and return its result dict."""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(scenario, use_cache)) as pool:
+        samples, elapsed = asyncio.run(_soak(pool, workers, consumers, interval, duration, seed))
+    ordered = sorted(samples.latencies)
+    checks = len(ordered)
+    cpu_per_check = samples.cpu / checks if checks else 0.0
+    return {
+        "scenario": scenario["name"],
+        "format": scenario.get("format"),
+        "key": scenario.get("key"),
+        "modules": scenario.get("modules"),
+        "license_bytes": os.path.getsize(scenario["license"]),
+        "checks": checks,
+        "invalid": samples.invalid,
+        "offered_per_s": round(consumers / interval, 1),
+        "throughput_per_s": round(checks / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(ordered, 0.50) * 1e3, 3),
+            "p95": round(_percentile(ordered, 0.95) * 1e3, 3),
+            "p99": round(_percentile(ordered, 0.99) * 1e3, 3),
+            "max": round(ordered[-1] * 1e3, 3) if ordered else 0.0,
+            "mean": round(statistics.fmean(ordered) * 1e3, 3) if ordered else 0.0,
+        },
+        "cpu_us_per_check": round(cpu_per_check * 1e6, 1),
+        "consumers_per_core": int(PRODUCTION_INTERVAL / cpu_per_check) if cpu_per_check else None,
+        "worker_max_rss_kb": samples.worker_rss_kb or None,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Soak-test license verification under fleet load.")
+    parser.add_argument("--keys", nargs="+", default=list(DEFAULT_KEYS), metavar="SPEC",
+                        help="Key specs: rsa-<bits>, p256, ed25519 (default: %(default)s)")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--module-counts", nargs="+", type=int, default=list(DEFAULT_MODULE_COUNTS),
+                        metavar="N", help="Modules per license (default: %(default)s)")
+    parser.add_argument("--license", help="Soak an existing developer license instead of generating")
+    parser.add_argument("--company", help="Company license to go with --license")
+    parser.add_argument("--public-key", help="Public key for --license")
+    parser.add_argument("--consumers", type=int, default=DEFAULT_CONSUMERS,
+                        help="Simulated apps (default: %(default)s)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="Seconds between one app's checks; the real app uses "
+                             f"{PRODUCTION_INTERVAL} (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION,
+                        help="Seconds per scenario (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Verifying processes; 0 uses every CPU (default: %(default)s)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep a verification cache in each worker (warm re-checks)")
+    parser.add_argument("--output", help="Write the results as JSON")
+    return parser
+
+
+def _print_row(result):
+    latency = result["latency_ms"]
+    print(f"{result['scenario']:<22} {result['license_bytes']:>6} B {result['throughput_per_s']:>9.1f}/s "
+          f"p50 {latency['p50']:>8.2f} ms p99 {latency['p99']:>8.2f} ms "
+          f"{result['cpu_us_per_check']:>8.1f} us/check {result['consumers_per_core'] or 0:>10} apps/core "
+          f"rss {result['worker_max_rss_kb'] or 0} KiB", flush=True)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.consumers < 1 or args.interval <= 0 or args.duration <= 0:
+        print("[ERROR] --consumers, --interval and --duration must be positive", file=sys.stderr)
+        return 2
+    workers = args.workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory(prefix="license-soak-") as workdir:
+        if args.license:
+            if not (args.company and args.public_key):
+                print("[ERROR] --license needs --company and --public-key", file=sys.stderr)
+                return 2
+            for path in (args.license, args.company, args.public_key):
+                if not os.path.isfile(path):
+                    print(f"[ERROR] {path} does not exist", file=sys.stderr)
+                    return 2
+            scenarios = [{"name": os.path.basename(args.license), "license": args.license,
+                          "company": args.company, "public_key": args.public_key}]
+        else:
+            try:
+                for spec in args.keys:
+                    check_spec(spec)
+            except ValueError as e:
+                print(f"[ERROR] {e}", file=sys.stderr)
+                return 2
+            print(f"[INFO] Generating {len(args.keys)} key pair(s) and licenses...", file=sys.stderr)
+            scenarios = build_scenarios(workdir, args.keys, args.formats, args.module_counts)
+        print(f"[INFO] {args.consumers} consumer(s) every {args.interval:g}s, {workers} worker(s), "
+              f"{args.duration:g}s per scenario, cache {'on' if args.cache else 'off'}", file=sys.stderr)
+        results = []
+        for scenario in scenarios:
+            result = run_scenario(scenario, args.consumers, args.interval, args.duration, workers,
+                                  args.cache)
+            results.append(result)
+            _print_row(result)
+    report = {
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "cpus": os.cpu_count(),
+        "workers": workers,
+        "consumers": args.consumers,
+        "interval_s": args.interval,
+        "duration_s": args.duration,
+        "cache": args.cache,
+        "parent_max_rss_kb": _max_rss_kb(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Results written to {args.output}", file=sys.stderr)
+    invalid = sum(result["invalid"] for result in results)
+    if invalid:
+        print(f"[ERROR] {invalid} check(s) came back invalid", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""Verify developer (``license.lic``) and company (``company-license.lic``) licenses.
+
+This mirrors what the consuming application checks:
+
+* developer license: base64 JSON whose ``signature`` is a 129 char random
+  prefix plus the hex signature of the compact JSON of the other fields,
+  checked against the public key (RSA-SHA256, or the ``alg`` named in the
+  payload: ``ES256`` / ``EdDSA``);
+* company license: base64 JSON whose ``signature`` is
+  ``sha256(startDate + endDate)``.
+
+The expensive part (decode + signature check) is memoized by the sha256 of the
+file content, so re-checking an unchanged file is a hash and a dict lookup.
+Entries are dropped once the license's ``endDate`` has passed.
+
+Usage:
+    python license_verify.py --license license.lic --company company-license.lic --public-key public_key.pem
+"""
+import argparse
+import base64
+import binascii
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import lru_cache
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, padding
+
+from license_core import (
+    DATE_FORMAT,
+    EDDSA,
+    ES256,
+    PREFIX_LENGTH,
+    RS256,
+    canonical_json,
+    key_algorithm,
+    payload_digest,
+)
+from license_compact import is_compact, to_v1_dict
+from license_keys import load_public_key
+
+DEVELOPER = "developer"
+COMPANY = "company"
+
+# Statuses, shared with the audit tooling
+VALID = "valid"
+EXPIRED = "expired"
+NOT_YET_VALID = "not_yet_valid"
+BAD_SIGNATURE = "bad_signature"
+MALFORMED = "malformed"
+REVOKED = "revoked"
+
+DEVELOPER_FIELDS = ("customerId", "startDate", "endDate", "modules", "signature")
+COMPANY_FIELDS = ("startDate", "endDate", "signature")
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class MalformedLicense(ValueError):
+    pass
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value):
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+def decode_license(content):
+    """Decode a base64 v1 or binary v2 license into a dict. Raises ``MalformedLicense``."""
+    if isinstance(content, str):
+        content = content.encode("ascii", "replace")
+    if is_compact(content):
+        try:
+            return to_v1_dict(content)
+        except ValueError as e:
+            raise MalformedLicense(str(e))
+    try:
+        data = json.loads(base64.b64decode(content.strip(), validate=True).decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise MalformedLicense(f"Cannot decode license: {e}")
+    if not isinstance(data, dict):
+        raise MalformedLicense("License is not a JSON object")
+    return data
+
+
+def detect_kind(data):
+    """Developer licenses carry a customer and modules; company licenses only dates."""
+    return DEVELOPER if "customerId" in data or "modules" in data else COMPANY
+
+
+def require_fields(data, fields):
+    missing = [f for f in fields if f not in data]
+    if missing:
+        raise MalformedLicense(f"Missing fields: {', '.join(missing)}")
+    try:
+        parse_date(data["startDate"])
+        parse_date(data["endDate"])
+    except (TypeError, ValueError):
+        raise MalformedLicense("Dates must be in YYYY-MM-DD format")
+
+
+def verify_payload(public_key, signature: bytes, payload: bytes, algorithm=RS256):
+    """Raise ``InvalidSignature`` unless ``signature`` signs ``payload`` with ``algorithm``."""
+    if key_algorithm(public_key) != algorithm:
+        raise InvalidSignature(f"Public key does not match {algorithm}")
+    if algorithm == RS256:
+        public_key.verify(signature, payload, padding.PKCS1v15(), hashes.SHA256())
+    elif algorithm == ES256:
+        public_key.verify(signature, payload, ec.ECDSA(hashes.SHA256()))
+    elif algorithm == EDDSA:
+        public_key.verify(signature, payload)
+    else:
+        raise InvalidSignature(f"Unsupported algorithm: {algorithm}")
+
+
+def check_developer_signature(data, public_key):
+    """True if ``data['signature']`` (minus its random prefix) signs the other fields."""
+    signature = data["signature"]
+    if not isinstance(signature, str) or len(signature) <= PREFIX_LENGTH:
+        return False
+    license_data = {k: v for k, v in data.items() if k != "signature"}
+    try:
+        verify_payload(
+            public_key,
+            bytes.fromhex(signature[PREFIX_LENGTH:]),
+            canonical_json(license_data).encode("utf-8"),
+            data.get("alg", RS256)
+        )
+    except (InvalidSignature, ValueError):
+        return False
+    return True
+
+
+def check_company_signature(data):
+    expected = hashlib.sha256(f"{data['startDate']}{data['endDate']}".encode()).hexdigest()
+    return data["signature"] == expected
+
+
+def date_status(data, today=None):
+    """``VALID``, ``EXPIRED`` or ``NOT_YET_VALID`` for ``today`` (inclusive window)."""
+    today = today or date.today()
+    if today < parse_date(data["startDate"]):
+        return NOT_YET_VALID
+    if today > parse_date(data["endDate"]):
+        return EXPIRED
+    return VALID
+
+
+def make_result(kind, status, data=None, error=None):
+    return {"kind": kind, "status": status, "valid": status == VALID,
+            "license": data, "error": error}
+
+
+class VerificationCache:
+    """LRU of decode + signature results keyed by content digest.
+
+    Only the date-independent part is cached; the date window is re-evaluated
+    on every lookup, and an entry is dropped once its ``endDate`` has passed.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cache_key, today):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            data, status, error, end_date = entry
+            if end_date is not None and today > end_date:
+                del self._entries[cache_key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return data, status, error
+
+    def put(self, cache_key, data, status, error, today=None):
+        # Keep the expiry date only while it is still ahead; once the window has
+        # ended the cached decode stays good and simply reports EXPIRED.
+        end_date = None
+        if status is None:
+            end_date = parse_date(data["endDate"])
+            if end_date < (today or date.today()):
+                end_date = None
+        with self._lock:
+            self._entries[cache_key] = (data, status, error, end_date)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+default_cache = VerificationCache()
+
+
+def _check(kind, content, cache_key, checker, today, cache):
+    """Shared decode/verify/cache flow. ``checker(data)`` returns True for a good signature."""
+    today = today or date.today()
+    cache = default_cache if cache is None else cache
+    cached = cache.get(cache_key, today)
+    if cached is None:
+        status = error = None
+        try:
+            data = decode_license(content)
+            require_fields(data, DEVELOPER_FIELDS if kind == DEVELOPER else COMPANY_FIELDS)
+            if not checker(data):
+                status = BAD_SIGNATURE
+        except MalformedLicense as e:
+            data, status, error = None, MALFORMED, str(e)
+        if data is not None:
+            cache.put(cache_key, data, status, error, today)
+    else:
+        data, status, error = cached
+    if status is None:
+        status = date_status(data, today)
+    return make_result(kind, status, data, error)
+
+
+def _content_key(content):
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def verify_developer_license(content, public_key_path, today=None, cache=None,
+                             revocations=None):
+    """Verify an encoded developer license against the PEM public key.
+
+    ``revocations`` is an optional ``license_revocation.RevocationList``; a
+    listed license reports ``REVOKED`` whatever its dates.
+    """
+    st = os.stat(public_key_path)
+    cache_key = (DEVELOPER, _content_key(content), os.path.abspath(public_key_path), st.st_mtime_ns)
+    public_key = None
+
+    def checker(data):
+        nonlocal public_key
+        public_key = public_key or load_public_key(public_key_path)
+        return check_developer_signature(data, public_key)
+
+    result = _check(DEVELOPER, content, cache_key, checker, today, cache)
+    if revocations is not None and result["status"] not in (MALFORMED, BAD_SIGNATURE) \
+            and revocations.is_revoked(payload_digest(result["license"])):
+        result = make_result(DEVELOPER, REVOKED, result["license"])
+    return result
+
+
+def verify_company_license(content, today=None, cache=None):
+    """Verify an encoded company license (sha256 of start and end date)."""
+    cache_key = (COMPANY, _content_key(content))
+    return _check(COMPANY, content, cache_key, check_company_signature, today, cache)
+
+
+def read_license_file(file_path):
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+def verify_combined(license_path, company_path, public_key_path, today=None, cache=None,
+                    revocations=None):
+    """AND-gate of both licenses, like ``CombinedLicenseValidator``."""
+    developer = verify_developer_license(read_license_file(license_path), public_key_path,
+                                         today, cache, revocations)
+    company = verify_company_license(read_license_file(company_path), today, cache)
+    valid = developer["valid"] and company["valid"]
+    modules = developer["license"]["modules"] if valid else []
+    return {"valid": valid, "modules": modules, "developer": developer, "company": company}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Verify license files.")
+    parser.add_argument("--license", help="Developer license (license.lic)")
+    parser.add_argument("--company", help="Company license (company-license.lic)")
+    parser.add_argument("--public-key", help="Public key (PEM) for the developer license")
+    parser.add_argument("--revocations", help="Signed revocation list to check the developer license against")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.license and not args.public_key:
+        print("[ERROR] --public-key is required to verify a developer license", file=sys.stderr)
+        return 2
+    revocations = None
+    if args.revocations:
+        from license_revocation import RevocationList
+        revocations = RevocationList(args.revocations, args.public_key)
+    if args.license and args.company:
+        report = verify_combined(args.license, args.company, args.public_key,
+                                 revocations=revocations)
+    elif args.license:
+        report = verify_developer_license(read_license_file(args.license), args.public_key,
+                                          revocations=revocations)
+    elif args.company:
+        report = verify_company_license(read_license_file(args.company))
+    else:
+        build_parser().print_usage(sys.stderr)
+        return 2
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0 if report["valid"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
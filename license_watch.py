@@ -0,0 +1,359 @@
+"""Local daemon that keeps the combined license status hot and serves it over a Unix socket.
+
+Instead of decoding and verifying both licenses on a timer, the daemon
+re-verifies only when:
+
+* inotify reports that ``license.lic`` or ``company-license.lic`` was written,
+  moved or deleted (the parent directories are watched, so replace-by-rename
+  works), or
+* a validity boundary passes: midnight of a ``startDate`` or the midnight after
+  an ``endDate``.
+
+Between those events every answer is a pre-encoded response, so a query costs
+a socket round trip. The protocol is one command per line, any number per
+connection, one JSON line back per command:
+
+    status          -> {"valid": ..., "modules": [...], "developer": ..., "company": ...}
+    module <name>   -> {"module": "<name>", "allowed": true|false}
+
+Without inotify (non-Linux), the files' mtimes are polled every few seconds instead.
+
+Usage:
+    python license_watch.py serve --license license.lic --company company-license.lic \\
+        --public-key public_key.pem --socket /tmp/license.sock
+    python license_watch.py query status --socket /tmp/license.sock
+"""
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import selectors
+import socket
+import struct
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from license_verify import (
+    NOT_YET_VALID,
+    VALID,
+    parse_date,
+    read_license_file,
+    verify_company_license,
+    verify_developer_license,
+)
+
+MISSING = "missing"
+DEFAULT_SOCKET = "/tmp/license.sock"
+POLL_INTERVAL = 5.0
+# Upper bound on one select() wait; far-off boundaries overflow the poll timeout
+MAX_WAIT = 3600.0
+# Longest request line a client may send, and most unsent output kept per client
+MAX_LINE = 4096
+MAX_OUTBUF = 1 << 20
+
+# ---------- INOTIFY ----------
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal ctypes binding around inotify for watching directories."""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+
+    def add_watch(self, dir_path, mask=WATCH_MASK):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dir_path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {dir_path}")
+        self._dirs[wd] = dir_path
+
+    def read_paths(self):
+        """Drain pending events and return the set of full paths they touched."""
+        paths = set()
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return paths
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            wd, _mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if wd in self._dirs and name:
+                paths.add(os.path.join(self._dirs[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+# ---------- STATE ----------
+def _missing(kind, error):
+    return {"kind": kind, "status": MISSING, "valid": False, "license": None, "error": error}
+
+
+class LicenseState:
+    """Current combined status plus the pre-encoded responses served to clients."""
+
+    def __init__(self, license_path, company_path, public_key_path):
+        self.license_path = os.path.abspath(license_path)
+        self.company_path = os.path.abspath(company_path)
+        self.public_key_path = public_key_path
+        self.next_boundary = None
+        self.refreshes = 0
+        self.refresh()
+
+    @property
+    def paths(self):
+        return (self.license_path, self.company_path)
+
+    def refresh(self, today=None):
+        """Re-verify both files and rebuild the cached responses."""
+        today = today or date.today()
+        try:
+            developer = verify_developer_license(read_license_file(self.license_path),
+                                                 self.public_key_path, today)
+        except OSError as e:
+            developer = _missing("developer", str(e))
+        try:
+            company = verify_company_license(read_license_file(self.company_path), today)
+        except OSError as e:
+            company = _missing("company", str(e))
+
+        valid = developer["valid"] and company["valid"]
+        self.modules = frozenset(developer["license"]["modules"]) if valid else frozenset()
+        self.status = {"valid": valid, "modules": sorted(self.modules),
+                       "developer": _summary(developer), "company": _summary(company)}
+        self.status_response = _encode(self.status)
+        self._module_responses = {}
+        self.next_boundary = _next_boundary([developer, company], today)
+        self.refreshes += 1
+
+    def module_response(self, name):
+        response = self._module_responses.get(name)
+        if response is None:
+            response = _encode({"module": name, "allowed": name in self.modules})
+            self._module_responses[name] = response
+        return response
+
+    def answer(self, line):
+        command, _, arg = line.strip().partition(" ")
+        if command == "status":
+            return self.status_response
+        if command == "module" and arg:
+            return self.module_response(arg.strip())
+        return _encode({"error": f"unknown command: {line.strip()}"})
+
+
+def _summary(result):
+    data = result["license"] or {}
+    return {"status": result["status"], "customerId": data.get("customerId"),
+            "startDate": data.get("startDate"), "endDate": data.get("endDate"),
+            "error": result["error"]}
+
+
+def _encode(obj):
+    return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _next_boundary(results, today):
+    """The earliest future midnight at which either license changes state.
+
+    Only valid and not-yet-valid licenses change state with the date; a
+    license with a bad signature, revoked or malformed stays that way.
+    """
+    days = []
+    for result in results:
+        data = result["license"]
+        if not data or result["status"] not in (VALID, NOT_YET_VALID):
+            continue
+        try:
+            start = parse_date(data["startDate"])
+            # The day after 9999-12-31 does not exist; that license never expires
+            end = parse_date(data["endDate"]) + timedelta(days=1)
+        except OverflowError:
+            end = None
+        for day in (start, end):
+            if day is not None and day > today:
+                days.append(day)
+    return datetime.combine(min(days), datetime.min.time()) if days else None
+
+
+# ---------- SERVER ----------
+class _Client:
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbuf = b""
+        self.outbuf = b""
+
+
+def serve(state, socket_path=DEFAULT_SOCKET, poll_interval=POLL_INTERVAL):
+    """Run the event loop until interrupted."""
+    sel = selectors.DefaultSelector()
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(128)
+    server.setblocking(False)
+    sel.register(server, selectors.EVENT_READ, None)
+
+    try:
+        notifier = Inotify()
+        for dir_path in {os.path.dirname(p) for p in state.paths}:
+            notifier.add_watch(dir_path)
+        sel.register(notifier.fd, selectors.EVENT_READ, notifier)
+        mtimes = None
+    except (OSError, AttributeError):
+        notifier = None
+        mtimes = _stat_all(state.paths)
+
+    try:
+        while True:
+            timeout = poll_interval if notifier is None else MAX_WAIT
+            if state.next_boundary is not None:
+                until = (state.next_boundary - datetime.now()).total_seconds()
+                timeout = min(timeout, max(0.0, until))
+            for key, events in sel.select(timeout):
+                if key.data is None:
+                    conn, _ = server.accept()
+                    conn.setblocking(False)
+                    sel.register(conn, selectors.EVENT_READ, _Client(conn))
+                elif key.data is notifier:
+                    if notifier.read_paths() & set(state.paths):
+                        state.refresh()
+                else:
+                    _service_client(sel, key.data, events, state)
+            if state.next_boundary is not None and datetime.now() >= state.next_boundary:
+                state.refresh()
+            if notifier is None:
+                current = _stat_all(state.paths)
+                if current != mtimes:
+                    mtimes = current
+                    state.refresh()
+    finally:
+        sel.close()
+        server.close()
+        if notifier is not None:
+            notifier.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def _stat_all(paths):
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamps.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamps.append(None)
+    return stamps
+
+
+def _service_client(sel, client, events, state):
+    if events & selectors.EVENT_READ:
+        try:
+            data = client.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            data = None
+        except OSError:
+            data = b""
+        if data == b"":
+            sel.unregister(client.sock)
+            client.sock.close()
+            return
+        if data:
+            client.inbuf += data
+            *lines, client.inbuf = client.inbuf.split(b"\n")
+            if len(client.inbuf) > MAX_LINE:
+                # Requests are short; a client that never ends its line is dropped
+                # before its buffer can grow without bound
+                sel.unregister(client.sock)
+                client.sock.close()
+                return
+            client.outbuf += b"".join(state.answer(line.decode("utf-8", "replace"))
+                                      for line in lines if line.strip())
+    if client.outbuf:
+        try:
+            sent = client.sock.send(client.outbuf)
+            client.outbuf = client.outbuf[sent:]
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            sel.unregister(client.sock)
+            client.sock.close()
+            return
+    # Stop reading from a client that does not read its answers
+    mask = selectors.EVENT_READ if len(client.outbuf) < MAX_OUTBUF else 0
+    if client.outbuf:
+        mask |= selectors.EVENT_WRITE
+    sel.modify(client.sock, mask, client)
+
+
+# ---------- CLIENT ----------
+def query(commands, socket_path=DEFAULT_SOCKET):
+    """Send commands over one connection and return the decoded responses."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall("".join(c + "\n" for c in commands).encode("utf-8"))
+        responses = []
+        buf = b""
+        while len(responses) < len(commands):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            responses.extend(json.loads(line) for line in lines)
+        return responses
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="License watch daemon.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="Watch the licenses and serve their status")
+    serve_parser.add_argument("--license", default="license.lic")
+    serve_parser.add_argument("--company", default="company-license.lic")
+    serve_parser.add_argument("--public-key", required=True)
+    serve_parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    query_parser = sub.add_parser("query", help="Ask a running daemon")
+    query_parser.add_argument("request", nargs="+", help='"status" or "module <name>"')
+    query_parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "query":
+        start = time.perf_counter()
+        for response in query([" ".join(args.request)], args.socket):
+            print(json.dumps(response, indent=2, ensure_ascii=False))
+        print(f"[INFO] {(time.perf_counter() - start) * 1e6:.0f} us", file=sys.stderr)
+        return 0
+    state = LicenseState(args.license, args.company, args.public_key)
+    print(f"[INFO] Serving license status on {args.socket}", file=sys.stderr)
+    try:
+        serve(state, args.socket)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())